@@ -1,121 +1,100 @@
-from typing import Dict
+from typing import Dict, Iterable, Optional
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+PERIOD_FREQUENCIES = {
+    "day": "D",
+    "week": "W",
+    "month": "M",
+    "quarter": "Q",
+    "year": "Y",
+}
+# Trailing window in days of the engagement rate for each period
+RATE_WINDOWS = {"day": 1, "week": 7, "month": 30, "quarter": 90, "year": 365}
+ENGAGEMENT_TYPES = ["post", "like", "repost"]
+HEATMAP_CELLS = 7 * 24
+COHORT_COLORS = [
+    "rgba(255, 99, 132, 0.6)",
+    "rgba(54, 162, 235, 0.6)",
+    "rgba(255, 206, 86, 0.6)",
+    "rgba(75, 192, 192, 0.6)",
+    "rgba(153, 102, 255, 0.6)",
+    "rgba(255, 159, 64, 0.6)",
+]
+COUNTER_COLUMNS = [
+    "like_count",
+    "reply_count",
+    "quote_count",
+    "bookmark_count",
+    "repost_count",
+]
 
-# Function to create the dataframe
-def get_user_feed_df(user_feed: list, user_handle: str) -> DataFrame:
-    data = []
-    for post in user_feed:
-        ts = post.indexed_at
-        embed_type = post.embed.embed_type
-        likes = post.like_count
-        reposts = post.repost_count
-        replies = post.reply_count
-        quotes = post.quote_count
-        bookmarks = post.bookmark_count
-        handle = post.author.handle
-        if handle == user_handle:
-            data.append(
-                {
-                    "indexed_at": ts,
-                    "embed_type": embed_type,
-                    "like_count": likes,
-                    "reply_count": replies,
-                    "quote_count": quotes,
-                    "repost_count": reposts,
-                    "bookmark_count": bookmarks,
-                }
-            )
-    return pd.DataFrame(data)
+
+def build_feed_frame(feed_df: DataFrame) -> DataFrame:
+    # Parse timestamps once and materialise the cohort key of every period
+    df = feed_df.copy()
+    df["indexed_at"] = pd.to_datetime(df["indexed_at"])
+    for period, frequency in PERIOD_FREQUENCIES.items():
+        df[f"cohort_{period}"] = df["indexed_at"].dt.to_period(frequency)
+    return df
+
+
+def cohort_aggregates(feed_frame: DataFrame, period: str) -> Dict[str, DataFrame]:
+    if period not in PERIOD_FREQUENCIES:
+        period = "month"
+    # One grouped pass by cohort and embed type, the totals are re-summed from it
+    by_embed_type = feed_frame.groupby(
+        [f"cohort_{period}", "embed_type"], observed=True
+    )[COUNTER_COLUMNS].agg(["sum", "count"])
+    total = by_embed_type.groupby(level=0).sum()
+    for df in (by_embed_type, total):
+        for column in COUNTER_COLUMNS:
+            df[(column, "mean")] = df[(column, "sum")] / df[(column, "count")]
+    return {"total": total, "by_embed_type": by_embed_type}
 
 
 def agg_user_feed_dataframe(
-    feed_df: DataFrame, agg_column: str, column: str, agg: str, period: str
+    cohorts: Dict[str, DataFrame], column: str, agg: str
 ) -> Dict:
-    df = feed_df.copy()
-    df["indexed_at"] = pd.to_datetime(df["indexed_at"])
-    if period == "day":
-        df["cohort"] = df["indexed_at"].dt.to_period("D")
-    elif period == "week":
-        df["cohort"] = df["indexed_at"].dt.to_period("W")
-    elif period == "month":
-        df["cohort"] = df["indexed_at"].dt.to_period("M")
-    elif period == "quarter":
-        df["cohort"] = df["indexed_at"].dt.to_period("Q")
-    elif period == "year":
-        df["cohort"] = df["indexed_at"].dt.to_period("Y")
-    else:
-        df["cohort"] = df["indexed_at"].dt.to_period("M")
-    # Aggregate — for example, sum of values per month
-    agg_df = df.groupby("cohort", as_index=False).agg(
-        agg_column=(column, agg),
-    )
-    agg_df["cohort"] = agg_df["cohort"].astype(str)
-    agg_df[agg_column] = agg_df["agg_column"]
+    total = cohorts["total"]
     return {
-        "labels": agg_df["cohort"].to_list(),
-        "values": agg_df[agg_column].to_list(),
+        "labels": [str(cohort) for cohort in total.index],
+        "values": total[(column, agg)].to_list(),
     }
 
 
-def stacked_agg_user_feed_dataframe(feed_df: DataFrame, agg: str, period: str) -> Dict:
-    data_types = [
-        "like_count",
-        "reply_count",
-        "quote_count",
-        "bookmark_count",
-        "repost_count",
-    ]
-    df = feed_df.copy()
-    df["indexed_at"] = pd.to_datetime(df["indexed_at"])
-    if period == "day":
-        df["cohort"] = df["indexed_at"].dt.to_period("D")
-    elif period == "week":
-        df["cohort"] = df["indexed_at"].dt.to_period("W")
-    elif period == "month":
-        df["cohort"] = df["indexed_at"].dt.to_period("M")
-    elif period == "quarter":
-        df["cohort"] = df["indexed_at"].dt.to_period("Q")
-    elif period == "year":
-        df["cohort"] = df["indexed_at"].dt.to_period("Y")
-    else:
-        df["cohort"] = df["indexed_at"].dt.to_period("M")
-    # Aggregate — for example, sum of values per month
-    if agg == "sum":
-        agg_df = df.groupby("cohort", as_index=False)[data_types].sum()
-    elif agg == "mean":
-        agg_df = df.groupby("cohort", as_index=False)[data_types].mean()
-    else:
-        agg_df = df.groupby("cohort", as_index=False)[data_types].sum()
-    agg_df["cohort"] = agg_df["cohort"].astype(str)
+def stacked_agg_user_feed_dataframe(cohorts: Dict[str, DataFrame], agg: str) -> Dict:
+    if agg not in ("sum", "mean"):
+        agg = "sum"
+    total = cohorts["total"]
     return {
-        "labels": agg_df["cohort"].to_list(),
+        "labels": [str(cohort) for cohort in total.index],
         "datasets": [
             {
                 "label": "Likes",
-                "data": agg_df["like_count"].to_list(),
+                "data": total[("like_count", agg)].to_list(),
                 "backgroundColor": "rgba(255, 99, 132, 0.6)",
             },
             {
                 "label": "Replies",
-                "data": agg_df["reply_count"].to_list(),
+                "data": total[("reply_count", agg)].to_list(),
                 "backgroundColor": "rgba(54, 162, 235, 0.6)",
             },
             {
                 "label": "Reposts",
-                "data": agg_df["repost_count"].to_list(),
+                "data": total[("repost_count", agg)].to_list(),
                 "backgroundColor": "rgba(255, 206, 86, 0.6)",
             },
             {
                 "label": "Quotes",
-                "data": agg_df["quote_count"].to_list(),
+                "data": total[("quote_count", agg)].to_list(),
                 "backgroundColor": "rgba(153, 102, 255, 0.6)",
             },
             {
                 "label": "Bookmarks",
-                "data": agg_df["bookmark_count"].to_list(),
+                "data": total[("bookmark_count", agg)].to_list(),
                 "backgroundColor": "rgba(75, 192, 192, 0.6)",
             },
         ],
@@ -123,230 +102,212 @@ def stacked_agg_user_feed_dataframe(feed_df: DataFrame, agg: str, period: str) -
 
 
 def embed_type_agg_user_feed_dataframe(
-    feed_df: DataFrame, agg_column: str, column: str, agg: str, period: str
+    cohorts: Dict[str, DataFrame], column: str, agg: str
 ) -> Dict:
-    df = feed_df.copy()
-    df["indexed_at"] = pd.to_datetime(df["indexed_at"])
-    if period == "day":
-        df["cohort"] = df["indexed_at"].dt.to_period("D")
-    elif period == "week":
-        df["cohort"] = df["indexed_at"].dt.to_period("W")
-    elif period == "month":
-        df["cohort"] = df["indexed_at"].dt.to_period("M")
-    elif period == "quarter":
-        df["cohort"] = df["indexed_at"].dt.to_period("Q")
-    elif period == "year":
-        df["cohort"] = df["indexed_at"].dt.to_period("Y")
-    else:
-        df["cohort"] = df["indexed_at"].dt.to_period("M")
-    # Aggregate — for example, sum of values per month
-    agg_df = df.groupby(["cohort", "embed_type"], as_index=False).agg(
-        agg_column=(column, agg),
-    )
-    agg_df["cohort"] = agg_df["cohort"].astype(str)
-    agg_df[agg_column] = agg_df["agg_column"]
-    # We need to infill values where we are missing date <> embed_type combos
-    all_periods = agg_df["cohort"].unique()
-    all_types = agg_df["embed_type"].unique()
-    full_index = pd.MultiIndex.from_product(
-        [all_periods, all_types], names=["cohort", "embed_type"]
-    )
-    df_full = (
-        agg_df.set_index(["cohort", "embed_type"])
-        .reindex(full_index, fill_value=0)
-        .reset_index()
-    )
+    # Cohorts missing an embed type that exists elsewhere are filled with 0
+    values = cohorts["by_embed_type"][(column, agg)].unstack(fill_value=0)
+
+    def embed_type_data(embed_type: str) -> list:
+        if embed_type not in values.columns:
+            return []
+        return values[embed_type].to_list()
+
     return {
-        "labels": df_full[df_full["embed_type"] == "images"]["cohort"].to_list(),
+        "labels": (
+            [str(cohort) for cohort in values.index]
+            if "images" in values.columns
+            else []
+        ),
         "datasets": [
             {
                 "label": "Images",
-                "data": df_full[df_full["embed_type"] == "images"][
-                    agg_column
-                ].to_list(),
+                "data": embed_type_data("images"),
                 "backgroundColor": "rgba(255, 99, 132, 0.6)",
             },
             {
                 "label": "Video",
-                "data": df_full[df_full["embed_type"] == "video"][agg_column].to_list(),
+                "data": embed_type_data("video"),
                 "backgroundColor": "rgba(54, 162, 235, 0.6)",
             },
             {
                 "label": "Other",
-                "data": df_full[df_full["embed_type"] == "other"][agg_column].to_list(),
+                "data": embed_type_data("other"),
                 "backgroundColor": "rgba(255, 206, 86, 0.6)",
             },
         ],
     }
 
 
-def agg_engagement_rate(engagement_df: DataFrame, period: str) -> Dict:
-    if period == "day":
-        window = 1
-    elif period == "week":
-        window = 7
-    elif period == "month":
-        window = 30
-    elif period == "quarter":
-        window = 90
-    elif period == "year":
-        window = 365
-    else:
-        window = 30
-    df = engagement_df.copy()
-    df["date_day"] = df["indexed_at"].dt.date
-    df["post"] = (df["type"] == "post").astype(int)
-    df["like"] = (df["type"] == "like").astype(int)
-    df["repost"] = (df["type"] == "repost").astype(int)
-    grouped_df = df.groupby("date_day", as_index=False)[
-        ["post", "like", "repost"]
-    ].sum()
-    grouped_df = grouped_df.sort_values("date_day")
-    grouped_df = grouped_df.set_index("date_day")
-    grouped_df["post_past_30"] = (
-        grouped_df["post"].shift(1).rolling(window=window).sum()
-    )
-    grouped_df["like_past_30"] = (
-        grouped_df["like"].shift(1).rolling(window=window).sum()
-    )
-    grouped_df["repost_past_30"] = (
-        grouped_df["repost"].shift(1).rolling(window=window).sum()
-    )
-    grouped_df = grouped_df.reset_index()
-    grouped_df["engagements_past_30"] = (
-        grouped_df["like_past_30"] + grouped_df["repost_past_30"]
-    )
+def engagement_rate_windows(engagement_df: DataFrame) -> Dict:
+    """
+    Engagements (likes + reposts) per post over the trailing window before
+    each day, for every window in RATE_WINDOWS. Events are scattered into
+    dense per-day arrays over the account's lifetime, so windows span
+    calendar days, and every window is a difference of one cumulative sum.
+    """
+    types = pd.Categorical(engagement_df["type"], categories=ENGAGEMENT_TYPES).codes
+    days = engagement_df["indexed_at"].values.astype("datetime64[D]")
+    keep = (types >= 0) & ~np.isnat(days)
+    types, days = types[keep], days[keep]
+    if not len(days):
+        return {"days": [], "rates": {period: np.zeros(0) for period in RATE_WINDOWS}}
+    first_day = days.min()
+    offsets = (days - first_day).astype(np.int64)
+    n_days = offsets.max() + 1
+    counts = np.bincount(
+        offsets * len(ENGAGEMENT_TYPES) + types,
+        minlength=n_days * len(ENGAGEMENT_TYPES),
+    ).reshape(n_days, len(ENGAGEMENT_TYPES))
+    # Row i holds the totals of every day before day i
+    before = np.zeros((n_days + 1, len(ENGAGEMENT_TYPES)), dtype=np.int64)
+    np.cumsum(counts, axis=0, out=before[1:])
+    posts_before = before[:, 0]
+    engagements_before = before[:, 1] + before[:, 2]
+    day = np.arange(n_days)
+    rates = {}
+    for period, window in RATE_WINDOWS.items():
+        start = np.maximum(day - window, 0)
+        posts = posts_before[day] - posts_before[start]
+        engagements = engagements_before[day] - engagements_before[start]
+        rates[period] = np.divide(
+            engagements, posts, out=np.zeros(n_days), where=posts > 0
+        )
     return {
-        "labels": grouped_df["date_day"].to_list(),
-        "values": [
-            x / y if y != 0 else 0
-            for x, y in zip(
-                grouped_df["engagements_past_30"].fillna(0).to_list(),
-                grouped_df["post_past_30"].fillna(0).to_list(),
-            )
-        ],
+        "days": (first_day + day).astype(object).tolist(),
+        "rates": rates,
     }
 
 
-def agg_engagement_by_hour(engagement_df: DataFrame) -> Dict:
-    df = engagement_df.copy()
-    df["date_hour_part"] = df["indexed_at"].dt.hour
-    df["date_day_part"] = df["indexed_at"].dt.day_of_week
-    df["day_hour"] = df["date_hour_part"] + df["date_day_part"] * 24
-    df["post"] = (df["type"] == "post").astype(int)
-    df["like"] = (df["type"] == "like").astype(int)
-    df["repost"] = (df["type"] == "repost").astype(int)
-    grouped_df = df.groupby("day_hour", as_index=False)[
-        ["post", "like", "repost"]
-    ].sum()
-    grouped_df["norm_post"] = grouped_df["post"] / grouped_df["post"].sum()
-    grouped_df["norm_like"] = grouped_df["like"] / grouped_df["like"].sum()
-    grouped_df["norm_repost"] = grouped_df["repost"] / grouped_df["repost"].sum()
-    return {
-        "labels": grouped_df["day_hour"].to_list(),
-        "datasets": [
-            {
-                "label": "Post %",
-                "data": grouped_df["norm_post"].to_list(),
-                "backgroundColor": "rgba(255, 99, 132, 0.6)",
-            },
-            {
-                "label": "Like %",
-                "data": grouped_df["norm_like"].to_list(),
-                "backgroundColor": "rgba(54, 162, 235, 0.6)",
-            },
-            {
-                "label": "Repost %",
-                "data": grouped_df["norm_repost"].to_list(),
-                "backgroundColor": "rgba(255, 206, 86, 0.6)",
-            },
-        ],
-    }
+def agg_engagement_rate(engagement_rates: Dict, period: str) -> Dict:
+    rates = engagement_rates["rates"].get(period, engagement_rates["rates"]["month"])
+    return {"labels": engagement_rates["days"], "values": rates.tolist()}
 
 
-def cohort_curves_likes(engagement_df: DataFrame, period: str) -> Dict:
-    df = engagement_df.copy()
-    df["hours_to_engagement"] = round(
-        (df["indexed_at"] - df["post_indexed_at"]).dt.total_seconds() / 3600, 0
+def weekday_hour_heatmap(
+    frame: DataFrame,
+    tz: str = "UTC",
+    by: Optional[str] = None,
+    values: Iterable[str] = (),
+) -> Dict:
+    """
+    7 x 24 counts of the frame's rows by local weekday (Monday = 0) and hour
+    of indexed_at in tz, split by the ENGAGEMENT_TYPES of column by (or all
+    counted as posts), with the sums and means of the value columns.
+    """
+    local = frame["indexed_at"].dt.tz_convert(tz).dt.tz_localize(None)
+    hours = local.values.astype("datetime64[h]").astype(np.int64)
+    # 1970-01-01 was a Thursday
+    cells = ((hours // 24 + 3) % 7) * 24 + hours % 24
+    groups = (
+        pd.Categorical(frame[by], categories=ENGAGEMENT_TYPES).codes
+        if by
+        else np.zeros(len(frame), dtype=np.int8)
     )
-    df_filtered = df[
-        (df["type"] == "like")
-        & (df["hours_to_engagement"] > 0)
-        & (df["hours_to_engagement"] <= 504)
-    ]
-    if period == "day":
-        df_filtered["cohort"] = (
-            df_filtered["post_indexed_at"].dt.to_period("D").astype(str)
-        )
-    elif period == "week":
-        df_filtered["cohort"] = (
-            df_filtered["post_indexed_at"].dt.to_period("W").astype(str)
-        )
-    elif period == "month":
-        df_filtered["cohort"] = (
-            df_filtered["post_indexed_at"].dt.to_period("M").astype(str)
-        )
-    elif period == "quarter":
-        df_filtered["cohort"] = (
-            df_filtered["post_indexed_at"].dt.to_period("Q").astype(str)
-        )
-    elif period == "year":
-        df_filtered["cohort"] = (
-            df_filtered["post_indexed_at"].dt.to_period("Y").astype(str)
-        )
-    else:
-        df_filtered["cohort"] = (
-            df_filtered["post_indexed_at"].dt.to_period("M").astype(str)
-        )
-    cohort_curve = (
-        df_filtered.groupby("cohort")
-        .apply(
-            lambda x: x["hours_to_engagement"].value_counts().sort_index().cumsum()
-            / len(x)
+    keep = groups >= 0
+    cells = cells[keep] + groups[keep].astype(np.int64) * HEATMAP_CELLS
+    size = len(ENGAGEMENT_TYPES) * HEATMAP_CELLS
+    shape = (len(ENGAGEMENT_TYPES), 7, 24)
+    counts = np.bincount(cells, minlength=size).reshape(shape)
+    heatmap = {"counts": dict(zip(ENGAGEMENT_TYPES, counts)), "sums": {}, "means": {}}
+    for column in values:
+        sums = np.bincount(
+            cells, weights=frame[column].to_numpy()[keep], minlength=size
+        ).reshape(shape)
+        means = np.divide(sums, counts, out=np.full(shape, np.nan), where=counts > 0)
+        heatmap["sums"][column] = dict(zip(ENGAGEMENT_TYPES, sums))
+        heatmap["means"][column] = dict(zip(ENGAGEMENT_TYPES, means))
+    return heatmap
+
+
+def agg_engagement_by_hour(heatmap: Dict) -> Dict:
+    # Share of each type's events in every hour of the week
+    datasets = []
+    for kind, label, color in (
+        ("post", "Post %", "rgba(255, 99, 132, 0.6)"),
+        ("like", "Like %", "rgba(54, 162, 235, 0.6)"),
+        ("repost", "Repost %", "rgba(255, 206, 86, 0.6)"),
+    ):
+        counts = heatmap["counts"][kind].ravel()
+        total = counts.sum()
+        shares = counts / total if total else np.zeros(HEATMAP_CELLS)
+        datasets.append(
+            {"label": label, "data": shares.tolist(), "backgroundColor": color}
         )
-        .unstack(0)
-        .reset_index()
+    return {"labels": list(range(HEATMAP_CELLS)), "datasets": datasets}
+
+
+def cohort_curves(
+    engagement_df: DataFrame, period: str, kind: str = "like", max_hours: int = 504
+) -> Dict:
+    """
+    Cumulative share of each cohort's engagements (those within max_hours of
+    posting) that arrived by every hour after posting, for all cohorts at
+    once. curves is a cohort x hour matrix whose column h is hour h + 1.
+    """
+    events = engagement_df[engagement_df["type"] == kind]
+    hours = np.round(
+        (events["indexed_at"] - events["post_indexed_at"]).dt.total_seconds() / 3600
+    ).to_numpy()
+    keep = (hours > 0) & (hours <= max_hours)
+    codes, cohorts = pd.factorize(
+        events["post_indexed_at"][keep].dt.to_period(
+            PERIOD_FREQUENCIES.get(period, "M")
+        ),
+        sort=True,
     )
-    filter_cohort_curve = cohort_curve[cohort_curve["hours_to_engagement"] <= 168]
-    filled_cohort_curve = filter_cohort_curve.ffill()
-    last_three_cols = filled_cohort_curve.columns[-3:].to_list()
+    counts = np.bincount(
+        codes * max_hours + hours[keep].astype(int) - 1,
+        minlength=len(cohorts) * max_hours,
+    ).reshape(len(cohorts), max_hours)
     return {
-        "labels": filled_cohort_curve["hours_to_engagement"].to_list(),
+        "cohorts": [str(cohort) for cohort in cohorts],
+        "curves": counts.cumsum(axis=1) / counts.sum(axis=1, keepdims=True),
+    }
+
+
+def cohort_curves_chart(curves: Dict, cohorts: int = 3, hours: int = 168) -> Dict:
+    # Chart.js payload for the latest cohorts over the first hours
+    labels = curves["cohorts"][-cohorts:] if cohorts else []
+    data = curves["curves"][len(curves["cohorts"]) - len(labels) :, :hours]
+    return {
+        "labels": list(range(1, data.shape[1] + 1)),
         "datasets": [
             {
-                "label": last_three_cols[0],
-                "data": filled_cohort_curve[last_three_cols[0]].to_list(),
-                "backgroundColor": "rgba(255, 99, 132, 0.6)",
-            },
-            {
-                "label": last_three_cols[1],
-                "data": filled_cohort_curve[last_three_cols[1]].to_list(),
-                "backgroundColor": "rgba(54, 162, 235, 0.6)",
-            },
-            {
-                "label": last_three_cols[2],
-                "data": filled_cohort_curve[last_three_cols[2]].to_list(),
-                "backgroundColor": "rgba(255, 206, 86, 0.6)",
-            },
+                "label": label,
+                "data": row.tolist(),
+                "backgroundColor": COHORT_COLORS[i % len(COHORT_COLORS)],
+            }
+            for i, (label, row) in enumerate(zip(labels, data))
         ],
     }
 
 
-def agg_post_engagement_by_post_day(feed_df: DataFrame) -> Dict:
-    df = feed_df.copy()
-    df["date_day_part"] = df["indexed_at"].dt.day_of_week
-    grouped_df = df.groupby("date_day_part", as_index=False)["like_count"].mean()
-    return {
-        "labels": grouped_df["date_day_part"].to_list(),
-        "values": grouped_df["like_count"].to_list(),
-    }
+def cohort_curves_likes(
+    engagement_df: DataFrame, period: str, cohorts: int = 3
+) -> Dict:
+    return cohort_curves_chart(cohort_curves(engagement_df, period, "like"), cohorts)
 
 
-def agg_post_engagement_by_post_hour(feed_df: DataFrame) -> Dict:
-    df = feed_df.copy()
-    df["date_hour_part"] = df["indexed_at"].dt.hour
-    grouped_df = df.groupby("date_hour_part", as_index=False)["like_count"].mean()
+def cohort_curves_reposts(
+    engagement_df: DataFrame, period: str, cohorts: int = 3
+) -> Dict:
+    return cohort_curves_chart(cohort_curves(engagement_df, period, "repost"), cohorts)
+
+
+def _mean_likes_by(heatmap: Dict, axis: int) -> Dict:
+    # Mean likes per post by weekday (axis=1) or hour (axis=0), posted slots only
+    counts = heatmap["counts"]["post"].sum(axis=axis)
+    sums = heatmap["sums"]["like_count"]["post"].sum(axis=axis)
+    posted = np.flatnonzero(counts)
     return {
-        "labels": grouped_df["date_hour_part"].to_list(),
-        "values": grouped_df["like_count"].to_list(),
+        "labels": posted.tolist(),
+        "values": (sums[posted] / counts[posted]).tolist(),
     }
+
+
+def agg_post_engagement_by_post_day(heatmap: Dict) -> Dict:
+    return _mean_likes_by(heatmap, axis=1)
+
+
+def agg_post_engagement_by_post_hour(heatmap: Dict) -> Dict:
+    return _mean_likes_by(heatmap, axis=0)
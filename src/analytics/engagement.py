@@ -1,69 +1,37 @@
 from datetime import datetime, timedelta
-from typing import Dict
+from operator import attrgetter
+from typing import Dict, List
 
+import numpy as np
 import pandas as pd
 import pytz
 from pandas import DataFrame
 
+from bluesky_client.graph_store import GraphSnapshot
 
-def get_likes_df(likes: list, follows: list, followers: list) -> DataFrame:
-    likes_df = pd.DataFrame([like.dict() for like in likes])
-    follows_df = pd.DataFrame([follow.dict() for follow in follows])
-    followers_df = pd.DataFrame([follower.dict() for follower in followers])
-    merged = likes_df.merge(
-        follows_df[["handle", "follow_index"]], on="handle", how="left"
-    )
-    merged["following"] = merged["follow_index"].notnull()
-    merged = merged[
-        ["post_uri", "post_indexed_at", "indexed_at", "handle", "avatar", "following"]
-    ]
-    merged = merged.merge(
-        followers_df[["handle", "follow_index"]], on="handle", how="left"
-    )
-    merged["follower"] = merged["follow_index"].notnull()
-    merged["type"] = "like"
-    return merged[
-        [
-            "post_uri",
-            "post_indexed_at",
-            "indexed_at",
-            "handle",
-            "avatar",
-            "following",
-            "follower",
-            "type",
-        ]
-    ]
-
-
-def get_reposts_df(reposts: list, follows: list, followers: list) -> DataFrame:
-    reposts_df = pd.DataFrame([repost.dict() for repost in reposts])
-    follows_df = pd.DataFrame([follow.dict() for follow in follows])
-    followers_df = pd.DataFrame([follower.dict() for follower in followers])
-    merged = reposts_df.merge(
-        follows_df[["handle", "follow_index"]], on="handle", how="left"
-    )
-    merged["following"] = merged["follow_index"].notnull()
-    merged = merged[
-        ["post_uri", "post_indexed_at", "indexed_at", "handle", "avatar", "following"]
-    ]
-    merged = merged.merge(
-        followers_df[["handle", "follow_index"]], on="handle", how="left"
-    )
-    merged["follower"] = merged["follow_index"].notnull()
-    merged["type"] = "repost"
-    return merged[
-        [
-            "post_uri",
-            "post_indexed_at",
-            "indexed_at",
-            "handle",
-            "avatar",
-            "following",
-            "follower",
-            "type",
-        ]
-    ]
+# Likes and reposts share these fields, in engagement frame column order
+EVENT_FIELDS = attrgetter(
+    "post_uri", "post_indexed_at", "indexed_at", "handle", "avatar", "did"
+)
+AUDIENCE_COLUMNS = [
+    "handle",
+    "avatar",
+    "total_likes",
+    "total_reposts",
+    "first_interaction",
+    "latest_interaction",
+    "follower",
+    "engaged_in_last_month",
+]
+AUDIENCE_SORT_METRICS = [
+    "total_engagement",
+    "total_likes",
+    "total_reposts",
+    "first_interaction",
+    "latest_interaction",
+]
+# Most audience members a single request may ask for
+MAX_AUDIENCE_LIMIT = 1000
 
 
 def get_engagement_score(feed_df: DataFrame, followers: int, period: str) -> int:
@@ -87,61 +55,81 @@ def get_engagement_score(feed_df: DataFrame, followers: int, period: str) -> int
 
 
 def get_engagement_df(
-    feed_posts: Dict, likes_df: DataFrame, reposts_df: DataFrame, user_handle: str
+    feed_posts: List,
+    likes: List,
+    reposts: List,
+    follows: GraphSnapshot,
+    followers: GraphSnapshot,
+    user_handle: str,
 ) -> DataFrame:
-    post_list = []
+    """
+    One row per like, repost and own post, built straight from the records.
+    Accounts are keyed on DID (None for own posts), so following/follower
+    and the audience survive handle changes.
+    """
+    rows = list(map(EVENT_FIELDS, likes)) + list(map(EVENT_FIELDS, reposts))
     for item in feed_posts:
-        if item.author.handle != user_handle:
-            continue
-        post_list.append(
-            {
-                "post_uri": item.uri,
-                "post_indexed_at": item.indexed_at,
-                "indexed_at": item.indexed_at,
-                "handle": user_handle,
-                "avatar": None,
-                "following": False,
-                "follower": False,
-                "type": "post",
-            }
-        )
-    feed_df = pd.DataFrame(post_list)
-    return pd.concat([likes_df, reposts_df, feed_df], ignore_index=True)
+        if item.author.handle == user_handle:
+            rows.append(
+                (item.uri, item.indexed_at, item.indexed_at, user_handle, None, None)
+            )
+    types = np.repeat(
+        ["like", "repost", "post"],
+        [len(likes), len(reposts), len(rows) - len(likes) - len(reposts)],
+    )
+    df = DataFrame.from_records(
+        rows,
+        columns=[
+            "post_uri",
+            "post_indexed_at",
+            "indexed_at",
+            "handle",
+            "avatar",
+            "did",
+        ],
+    )
+    for column in ("post_indexed_at", "indexed_at"):
+        # Records from the API and the stores carry different tzinfo objects
+        df[column] = pd.to_datetime(df[column], utc=True)
+    df["following"] = df["did"].isin(follows.dids)
+    df["follower"] = df["did"].isin(followers.dids)
+    df["type"] = types
+    return df
 
 
-def get_top_followers(engagement_df: DataFrame, limit: int = 4) -> Dict:
-    df = engagement_df.copy()
-    df_grouped = df.groupby(
-        ["handle", "avatar", "following", "follower"], as_index=False
-    ).count()
+def get_top_followers(
+    engagement_df: DataFrame,
+    limit: int = 4,
+    window_days: int = 30,
+    sort_by: str = "total_engagement",
+) -> List[Dict]:
+    """
+    Rank the followers that liked or reposted the user's posts, in a single
+    groupby over their events. sort_by is one of AUDIENCE_SORT_METRICS and
+    engaged_in_last_month flags activity in the last window_days.
+    """
+    events = engagement_df[engagement_df["follower"]]
+    events = events.assign(
+        is_like=events["type"] == "like", is_repost=events["type"] == "repost"
+    ).sort_values("indexed_at", ascending=False)
     now = datetime.now(pytz.UTC)
-    one_month_ago = now - timedelta(days=30)  # Roughly one month
-    audience = []
-    for index, row in (
-        df_grouped[df_grouped["follower"]]
-        .sort_values("type", ascending=False)
-        .head(limit + 1)
-        .iterrows()
-    ):
-        recent_engagement_df = engagement_df[
-            engagement_df["handle"] == row["handle"]
-        ].sort_values("indexed_at", ascending=False)
-        audience.append(
-            {
-                "handle": row["handle"],
-                "avatar": row["avatar"],
-                "total_likes": len(
-                    recent_engagement_df[recent_engagement_df["type"] == "like"]
-                ),
-                "total_reposts": len(
-                    recent_engagement_df[recent_engagement_df["type"] == "repost"]
-                ),
-                "first_interaction": recent_engagement_df["indexed_at"].min(),
-                "latest_interaction": recent_engagement_df["indexed_at"].max(),
-                "follower": True,
-                "engaged_in_last_month": one_month_ago
-                <= recent_engagement_df["indexed_at"].max()
-                <= now,
-            }
-        )
-    return audience
+    # One row per account however often it changed handle, showing its
+    # latest handle and latest known avatar (events without one are skipped)
+    audience = events.groupby("did", sort=False).agg(
+        handle=("handle", "first"),
+        avatar=("avatar", "first"),
+        total_likes=("is_like", "sum"),
+        total_reposts=("is_repost", "sum"),
+        first_interaction=("indexed_at", "min"),
+        latest_interaction=("indexed_at", "max"),
+    )
+    audience = audience[audience["avatar"].notna()]
+    audience["total_engagement"] = audience["total_likes"] + audience["total_reposts"]
+    audience["follower"] = True
+    audience["engaged_in_last_month"] = audience["latest_interaction"].between(
+        now - timedelta(days=window_days), now
+    )
+    audience = audience.sort_values(
+        [sort_by, "latest_interaction"], ascending=False
+    ).head(limit)
+    return audience.reset_index()[AUDIENCE_COLUMNS].to_dict("records")
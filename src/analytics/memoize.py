@@ -0,0 +1,146 @@
+import functools
+import hashlib
+import weakref
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from pandas import DataFrame
+from pandas.util import hash_pandas_object
+
+from bluesky_client.schemas.construct import record_type
+from bluesky_client.schemas.like import Like
+from bluesky_client.schemas.post import Post
+from bluesky_client.schemas.repost import Repost
+
+# Fields that identify a record and change whenever its data does
+FINGERPRINT_FIELDS = {
+    Post: (
+        "uri",
+        "like_count",
+        "quote_count",
+        "reply_count",
+        "repost_count",
+        "bookmark_count",
+    ),
+    Like: ("post_uri", "did", "indexed_at"),
+    Repost: ("post_uri", "did", "indexed_at"),
+}
+# Trusted records are named tuples with the same fields
+FINGERPRINT_FIELDS.update(
+    {record_type(model): fields for model, fields in list(FINGERPRINT_FIELDS.items())}
+)
+
+_memos: Dict[str, Dict] = {}
+# id of a DataFrame a memo returned -> (weak reference to it, its fingerprint)
+_frames: Dict[int, Tuple[weakref.ref, str]] = {}
+_lock = Lock()
+
+
+def _records_fingerprint(records: Iterable) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for item in records:
+        fields = FINGERPRINT_FIELDS.get(type(item))
+        if fields is None:
+            digest.update(fingerprint(item).encode())
+        else:
+            digest.update("\x1f".join(str(getattr(item, f)) for f in fields).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class FingerprintedList(list):
+    """
+    A snapshot list carrying the fingerprint of its records, computed once
+    when the snapshot is built instead of on every memoized call.
+    """
+
+    def __init__(self, records: Iterable = ()):
+        super().__init__(records)
+        self.fingerprint = _records_fingerprint(self)
+
+
+def _remember_frame(frame: DataFrame, key: str):
+    def forget(_, frame_id=id(frame)):
+        with _lock:
+            _frames.pop(frame_id, None)
+
+    with _lock:
+        _frames[id(frame)] = (weakref.ref(frame, forget), key)
+
+
+def fingerprint(value: Any) -> str:
+    if isinstance(value, DataFrame):
+        # A frame a memo returned is keyed on that memo's inputs, no hashing
+        with _lock:
+            known = _frames.get(id(value))
+        if known is not None and known[0]() is value:
+            return known[1]
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(",".join(map(str, value.columns)).encode())
+        digest.update(hash_pandas_object(value, index=False).values.tobytes())
+        return digest.hexdigest()
+    if hasattr(value, "fingerprint"):
+        return value.fingerprint
+    if isinstance(value, (list, tuple)):
+        return _records_fingerprint(value)
+    return repr(value)
+
+
+def memoize(name: str, backend: Optional[Any] = None) -> Callable:
+    """
+    Cache the last result of a builder keyed on the fingerprint of its
+    arguments, so it is rebuilt only when its inputs actually change.
+    With a shared backend (anything with get/set) results built by other
+    processes are reused too. Snapshot lists (FingerprintedList) and the
+    frames memos return carry their fingerprint, so keying them is free.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        memo = _memos.setdefault(
+            name,
+            {"key": None, "value": None, "hits": 0, "shared_hits": 0, "misses": 0},
+        )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = tuple(fingerprint(arg) for arg in args) + tuple(
+                (k, fingerprint(v)) for k, v in sorted(kwargs.items())
+            )
+            with _lock:
+                if memo["key"] == key:
+                    memo["hits"] += 1
+                    return memo["value"]
+            shared_key = "memo/{}/{}".format(
+                name, hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+            )
+            value = backend.get(shared_key) if backend is not None else None
+            if value is not None:
+                counter = "shared_hits"
+            else:
+                counter = "misses"
+                value = func(*args, **kwargs)
+                if backend is not None:
+                    backend.set(shared_key, value)
+            if isinstance(value, DataFrame):
+                _remember_frame(value, shared_key)
+            with _lock:
+                memo[counter] += 1
+                memo["key"] = key
+                memo["value"] = value
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def memo_stats() -> Dict:
+    with _lock:
+        return {
+            name: {
+                "hits": memo["hits"],
+                "shared_hits": memo["shared_hits"],
+                "misses": memo["misses"],
+            }
+            for name, memo in _memos.items()
+        }
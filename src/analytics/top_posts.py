@@ -1,42 +1,66 @@
-def get_most_liked_post(user_feed: list, user_handle: str) -> str:
-    most_likes = 0
-    url = ""
-    for post in user_feed:
-        if post.author.handle == user_handle:
-            if post.like_count > most_likes:
-                most_likes = post.like_count
-                url = post.embed.thumbnail
-    return url, most_likes
-
-
-def get_most_replied_post(user_feed: list, user_handle: str) -> str:
-    most_replies = 0
-    url = ""
-    for post in user_feed:
-        if post.author.handle == user_handle:
-            if post.reply_count > most_replies:
-                most_replies = post.reply_count
-                url = post.embed.thumbnail
-    return url, most_replies
-
-
-def get_most_reposted_post(user_feed: list, user_handle: str) -> str:
-    most_reposts = 0
-    url = ""
-    for post in user_feed:
-        if post.author.handle == user_handle:
-            if post.repost_count > most_reposts:
-                most_reposts = post.repost_count
-                url = post.embed.thumbnail
-    return url, most_reposts
-
-
-def get_most_bookmarked_post(user_feed: list, user_handle: str) -> str:
-    most_bookmarks = 0
-    url = ""
-    for post in user_feed:
-        if post.author.handle == user_handle:
-            if post.bookmark_count > most_bookmarks:
-                most_bookmarks = post.bookmark_count
-                url = post.embed.thumbnail
-    return url, most_bookmarks
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from bluesky_client.post_store import PostStore
+
+# Days looked back for each top-posts period, None is all time
+TOP_POST_PERIODS = {
+    "day": 1,
+    "week": 7,
+    "month": 30,
+    "quarter": 90,
+    "year": 365,
+    "all": None,
+}
+TOP_POST_METRICS = {
+    "like_count": "Most Liked",
+    "repost_count": "Most Reposted",
+    "reply_count": "Most Replied",
+    "quote_count": "Most Quoted",
+    "bookmark_count": "Most Bookmarked",
+}
+
+
+def get_top_posts(
+    store: PostStore,
+    user_handle: str,
+    counter: str = "like_count",
+    limit: int = 5,
+    period: str = "all",
+) -> List[Dict]:
+    days = TOP_POST_PERIODS.get(period)
+    since = None if days is None else datetime.now(timezone.utc) - timedelta(days=days)
+    return [
+        {
+            "uri": post.uri,
+            "text": post.record.text,
+            "thumbnail": post.embed.thumbnail,
+            "indexed_at": post.indexed_at,
+            "count": getattr(post, counter),
+            "counts": {metric: getattr(post, metric) for metric in TOP_POST_METRICS},
+        }
+        for post in store.top_posts(user_handle, counter, limit, since, trusted=True)
+    ]
+
+
+def get_most_post(store: PostStore, user_handle: str, counter: str) -> Tuple[str, int]:
+    top = get_top_posts(store, user_handle, counter, limit=1)
+    if not top or top[0]["count"] <= 0:
+        return "", 0
+    return top[0]["thumbnail"], top[0]["count"]
+
+
+def get_most_liked_post(store: PostStore, user_handle: str) -> Tuple[str, int]:
+    return get_most_post(store, user_handle, "like_count")
+
+
+def get_most_replied_post(store: PostStore, user_handle: str) -> Tuple[str, int]:
+    return get_most_post(store, user_handle, "reply_count")
+
+
+def get_most_reposted_post(store: PostStore, user_handle: str) -> Tuple[str, int]:
+    return get_most_post(store, user_handle, "repost_count")
+
+
+def get_most_bookmarked_post(store: PostStore, user_handle: str) -> Tuple[str, int]:
+    return get_most_post(store, user_handle, "bookmark_count")
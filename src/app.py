@@ -1,49 +1,92 @@
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from typing import List
 
+import pytz
 from atproto import Client
-from flask import Flask, jsonify, redirect, render_template, request, url_for
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_caching import Cache
 from pandas import DataFrame
 from werkzeug.utils import secure_filename
 
 from analytics.aggregations import (
+    PERIOD_FREQUENCIES,
     agg_engagement_by_hour,
     agg_engagement_rate,
     agg_post_engagement_by_post_day,
     agg_post_engagement_by_post_hour,
     agg_user_feed_dataframe,
+    build_feed_frame,
+    cohort_aggregates,
     cohort_curves_likes,
+    cohort_curves_reposts,
     embed_type_agg_user_feed_dataframe,
-    get_user_feed_df,
+    engagement_rate_windows,
     stacked_agg_user_feed_dataframe,
+    weekday_hour_heatmap,
 )
 from analytics.engagement import (
+    AUDIENCE_SORT_METRICS,
+    MAX_AUDIENCE_LIMIT,
     get_engagement_df,
     get_engagement_score,
-    get_likes_df,
-    get_reposts_df,
     get_top_followers,
 )
+from analytics.memoize import FingerprintedList, memo_stats, memoize
 from analytics.top_posts import (
+    TOP_POST_METRICS,
+    TOP_POST_PERIODS,
     get_most_bookmarked_post,
     get_most_liked_post,
     get_most_reposted_post,
+    get_top_posts,
 )
-from bluesky_client.get_author_feed import get_author_feed
+from bluesky_client.engagement_store import EngagementStore
+from bluesky_client.get_author_feed import sync_author_feed
 from bluesky_client.get_post_likes import get_post_likes
 from bluesky_client.get_post_reposts import get_post_reposts
-from bluesky_client.get_profile import get_followers, get_follows, get_profile
+from bluesky_client.get_profile import get_profile, sync_graph
+from bluesky_client.governor import RateLimitGovernor
+from bluesky_client.graph_store import GraphSnapshot, GraphStore
+from bluesky_client.post_store import PostStore
+from bluesky_client.refresh_post_metrics import refresh_post_metrics
 from bluesky_client.schemas.profile import Profile
+from bluesky_client.session import BlueskySession
 from config import (
     ALLOWED_EXTENSIONS,
+    BLUESKY_BASE_URL,
+    CACHE_PATH,
+    DISPLAY_TIMEZONE,
+    ENGAGEMENT_STORE_PATH,
+    FEED_FRESHNESS_DAYS,
+    GRAPH_STORE_PATH,
+    HARVEST_CONCURRENCY,
+    METRICS_FULL_REFRESH_SECONDS,
+    METRICS_REFRESH_DAYS,
+    POST_STORE_PATH,
+    REQUEST_MAX_ATTEMPTS,
     RULES_FOLDER,
     SCHEDULE_FOLDER,
+    SESSION_FILE,
+    TRUSTED_RECORDS,
     UPLOAD_FOLDER,
     UPLOAD_PATH,
     USER_HANDLE,
     USER_PASSWORD,
 )
+from json_payload import encode_event, encode_payload, etagged, payload_response
+from refresher import SnapshotRefresher
 from scheduler.scheduler_utils import (
     get_saved_schedule,
     update_queue_rules,
@@ -51,8 +94,21 @@ from scheduler.scheduler_utils import (
 )
 
 app = Flask(__name__)
-app.config["CACHE_TYPE"] = "simple"  # or 'redis', 'filesystem', etc.
+app.config["CACHE_TYPE"] = "shared_cache.SqliteArrowCache"
+app.config["CACHE_SQLITE_PATH"] = CACHE_PATH
 cache = Cache(app)
+# The harvest's worker threads share the governor's concurrency limit
+bluesky_session = BlueskySession(
+    USER_HANDLE,
+    USER_PASSWORD,
+    SESSION_FILE,
+    RateLimitGovernor(HARVEST_CONCURRENCY, REQUEST_MAX_ATTEMPTS),
+    BLUESKY_BASE_URL,
+)
+post_store = PostStore(POST_STORE_PATH)
+engagement_store = EngagementStore(ENGAGEMENT_STORE_PATH)
+graph_store = GraphStore(GRAPH_STORE_PATH)
+refresher = SnapshotRefresher(cache)
 
 # Config
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
@@ -66,68 +122,255 @@ def allowed_file(filename):
 
 
 def login_client() -> tuple[Client, str]:
-    client = Client()
-    client.login(USER_HANDLE, USER_PASSWORD)
+    client = bluesky_session.get_client()
     client_did = client.me.did
     return client, client_did
 
 
-@cache.cached(timeout=600, key_prefix="user_feed")
-def get_user_feed() -> List:
+@bluesky_session.reauthenticating
+def build_user_feed() -> List:
     client, client_did = login_client()
-    return get_author_feed(client, client_did)
+    sync_author_feed(
+        client,
+        client_did,
+        post_store,
+        FEED_FRESHNESS_DAYS,
+        trusted=TRUSTED_RECORDS,
+    )
+    refresh_post_metrics(
+        client, post_store, METRICS_REFRESH_DAYS, max_workers=HARVEST_CONCURRENCY
+    )
+    return FingerprintedList(post_store.all_posts(TRUSTED_RECORDS))
 
 
-@cache.cached(timeout=600, key_prefix="feed_df")
-def get_user_feed_dataframe(user_feed: list, handle: str) -> DataFrame:
-    return get_user_feed_df(user_feed, handle)
+@bluesky_session.reauthenticating
+def build_post_metrics() -> int:
+    # Counters of older posts change too, and their posts can be deleted
+    client, _ = login_client()
+    return refresh_post_metrics(
+        client, post_store, None, max_workers=HARVEST_CONCURRENCY
+    )
 
 
-@cache.cached(timeout=600, key_prefix="user_profile")
-def get_user_profile() -> Profile:
+@bluesky_session.reauthenticating
+def build_user_profile() -> Profile:
     client, client_did = login_client()
     return get_profile(client, client_did)
 
 
-@cache.cached(timeout=600, key_prefix="user_follows")
-def get_user_follows() -> list:
+@bluesky_session.reauthenticating
+def build_user_follows() -> GraphSnapshot:
     client, client_did = login_client()
-    return get_follows(client, client_did)
+    follows_count = get_user_profile().follows_count
+    return sync_graph(client, client_did, graph_store, "follows", follows_count)
 
 
-@cache.cached(timeout=600, key_prefix="user_followers")
-def get_user_followers() -> list:
+@bluesky_session.reauthenticating
+def build_user_followers() -> GraphSnapshot:
     client, client_did = login_client()
-    return get_followers(client, client_did)
+    followers_count = get_user_profile().followers_count
+    return sync_graph(client, client_did, graph_store, "followers", followers_count)
+
 
+@bluesky_session.reauthenticating
+def build_user_post_likes() -> list:
+    client, _ = login_client()
+    likes = get_post_likes(
+        client,
+        get_user_feed(),
+        USER_HANDLE,
+        max_workers=HARVEST_CONCURRENCY,
+        store=engagement_store,
+        trusted=TRUSTED_RECORDS,
+        progress=refresher.reporter("post_likes"),
+    )
+    return FingerprintedList(likes)
 
-@cache.cached(timeout=3600, key_prefix="post_likes")
-def get_user_post_likes(user_feed: list) -> list:
+
+@bluesky_session.reauthenticating
+def build_user_post_reposts() -> list:
     client, _ = login_client()
-    return get_post_likes(client, user_feed, USER_HANDLE)
+    reposts = get_post_reposts(
+        client,
+        get_user_feed(),
+        USER_HANDLE,
+        max_workers=HARVEST_CONCURRENCY,
+        store=engagement_store,
+        trusted=TRUSTED_RECORDS,
+        progress=refresher.reporter("post_reposts"),
+    )
+    return FingerprintedList(reposts)
+
+
+# likes-data charts built from the engagement frame alone
+ENGAGEMENT_CHARTS = {
+    "engagement_over_time": lambda df, period, tz: agg_engagement_rate(
+        get_engagement_rates(df), period
+    ),
+    "engagement_by_hour": lambda df, period, tz: agg_engagement_by_hour(
+        get_engagement_heatmap(df, tz)
+    ),
+    "cohort_curves": lambda df, period, tz: cohort_curves_likes(df, period),
+    "repost_cohort_curves": lambda df, period, tz: cohort_curves_reposts(df, period),
+}
+# Sources those charts need, the follow graph only matters to the audience
+CHART_SOURCES = {"user_feed", "post_likes", "post_reposts"}
+
+
+def engagement_payload(
+    engagement_df: DataFrame,
+    period: str,
+    tz: str,
+    audience_limit: int,
+    audience_window: int,
+    audience_sort: str,
+) -> dict:
+    payload = {
+        chart: build(engagement_df, period, tz)
+        for chart, build in ENGAGEMENT_CHARTS.items()
+    }
+    payload["top_followers"] = get_top_followers(
+        engagement_df, audience_limit, audience_window, audience_sort
+    )
+    payload["data_built_at"] = refresher.built_at(*ENGAGEMENT_SOURCES)
+    return payload
+
+
+def encode_stream_replay(payload: dict) -> dict:
+    # The whole likes-stream response of a likes-data payload, with its ETag
+    charts = [*ENGAGEMENT_CHARTS, "top_followers"]
+    events = [
+        encode_event("chart", {"chart": chart, "payload": payload[chart]})
+        for chart in charts
+    ]
+    done = {"data_built_at": payload["data_built_at"], "seconds": 0.0}
+    return etagged(b"".join(events) + encode_event("done", done))
+
+
+def build_engagement_payloads() -> dict:
+    # Serialized likes-data and likes-stream responses for every period with
+    # default options
+    engagement_df = get_current_engagement_dataframe()
+    payloads = {}
+    for period in PERIOD_FREQUENCIES:
+        payload = engagement_payload(
+            engagement_df, period, DISPLAY_TIMEZONE, **DEFAULT_AUDIENCE
+        )
+        payloads[period] = encode_payload(payload)
+        payloads[period]["stream"] = encode_stream_replay(payload)
+    return payloads
+
+
+# Upstream sources first, the background poller refreshes in this order
+refresher.register("post_metrics", build_post_metrics, METRICS_FULL_REFRESH_SECONDS)
+refresher.register("user_feed", build_user_feed, 600, depends_on=["post_metrics"])
+refresher.register("user_profile", build_user_profile, 600)
+refresher.register("user_follows", build_user_follows, 600)
+refresher.register("user_followers", build_user_followers, 600)
+refresher.register("post_likes", build_user_post_likes, 3600)
+refresher.register("post_reposts", build_user_post_reposts, 3600)
+FEED_SOURCES = ["user_feed", "user_profile"]
+ENGAGEMENT_SOURCES = [
+    "user_feed",
+    "user_follows",
+    "user_followers",
+    "post_likes",
+    "post_reposts",
+]
+refresher.register(
+    "engagement_payloads",
+    build_engagement_payloads,
+    3600,
+    depends_on=ENGAGEMENT_SOURCES,
+)
+DEFAULT_AUDIENCE = {
+    "audience_limit": 15,
+    "audience_window": 30,
+    "audience_sort": "total_engagement",
+}
 
 
-@cache.cached(timeout=3600, key_prefix="likes_df")
-def get_likes_dataframe(likes: list, follows: list, followers: list) -> DataFrame:
-    return get_likes_df(likes, follows, followers)
+def get_user_feed() -> List:
+    return refresher.get("user_feed")
 
 
-@cache.cached(timeout=3600, key_prefix="post_reposts")
-def get_user_post_reposts(user_feed: list) -> list:
-    client, _ = login_client()
-    return get_post_reposts(client, user_feed, USER_HANDLE)
+def get_user_profile() -> Profile:
+    return refresher.get("user_profile")
+
+
+def get_user_follows() -> GraphSnapshot:
+    return refresher.get("user_follows")
+
+
+def get_user_followers() -> GraphSnapshot:
+    return refresher.get("user_followers")
+
+
+def get_user_post_likes() -> list:
+    return refresher.get("post_likes")
+
+
+def get_user_post_reposts() -> list:
+    return refresher.get("post_reposts")
+
+
+@memoize("feed_df", cache)
+def get_user_feed_dataframe(user_feed: list, handle: str) -> DataFrame:
+    # The store already holds this feed, user_feed only keys the memo
+    return post_store.feed_dataframe(handle)
 
 
-@cache.cached(timeout=3600, key_prefix="reposts_df")
-def get_reposts_dataframe(likes: list, follows: list, followers: list) -> DataFrame:
-    return get_reposts_df(likes, follows, followers)
+@memoize("feed_frame", cache)
+def get_feed_frame(feed_df: DataFrame) -> DataFrame:
+    return build_feed_frame(feed_df)
 
 
-@cache.cached(timeout=3600, key_prefix="engagement_df")
+@memoize("engagement_df", cache)
 def get_engagement_dataframe(
-    feed_posts: dict, likes_df: DataFrame, reposts_df: DataFrame
+    feed_posts: list,
+    likes: list,
+    reposts: list,
+    follows: GraphSnapshot,
+    followers: GraphSnapshot,
 ) -> DataFrame:
-    return get_engagement_df(feed_posts, likes_df, reposts_df, USER_HANDLE)
+    return get_engagement_df(
+        feed_posts, likes, reposts, follows, followers, USER_HANDLE
+    )
+
+
+@memoize("engagement_rates", cache)
+def get_engagement_rates(engagement_df: DataFrame) -> dict:
+    return engagement_rate_windows(engagement_df)
+
+
+@memoize("feed_heatmap", cache)
+def get_feed_heatmap(feed_df: DataFrame, tz: str) -> dict:
+    return weekday_hour_heatmap(feed_df, tz, values=["like_count"])
+
+
+@memoize("engagement_heatmap", cache)
+def get_engagement_heatmap(engagement_df: DataFrame, tz: str) -> dict:
+    return weekday_hour_heatmap(engagement_df, tz, by="type")
+
+
+def get_current_engagement_dataframe() -> DataFrame:
+    return get_engagement_dataframe(
+        get_user_feed(),
+        get_user_post_likes(),
+        get_user_post_reposts(),
+        get_user_follows(),
+        get_user_followers(),
+    )
+
+
+def display_timezone() -> str:
+    tz = request.args.get("tz", DISPLAY_TIMEZONE)
+    return tz if tz in pytz.all_timezones_set else DISPLAY_TIMEZONE
+
+
+@app.before_request
+def start_refresher():
+    refresher.start()
 
 
 @app.route("/")
@@ -184,34 +427,37 @@ def analytics():
     followers_count = user_profile.followers_count
     following_count = user_profile.follows_count
     engagement_rate = get_engagement_score(feed_df, followers_count, period)
-    total_likes = agg_user_feed_dataframe(
-        feed_df, "total_likes", "like_count", "sum", period
-    )
+    cohorts = cohort_aggregates(get_feed_frame(feed_df), period)
+    total_likes = agg_user_feed_dataframe(cohorts, "like_count", "sum")
     likes = sum(total_likes["values"])
-    total_posts = agg_user_feed_dataframe(
-        feed_df, "total_posts", "like_count", "count", period
-    )
+    total_posts = agg_user_feed_dataframe(cohorts, "like_count", "count")
     posts = sum(total_posts["values"])
-    avg_likes = agg_user_feed_dataframe(
-        feed_df, "average_likes", "like_count", "mean", period
-    )
+    avg_likes = agg_user_feed_dataframe(cohorts, "like_count", "mean")
     average_likes = round(likes / posts, 0)
-    stacked_totals = stacked_agg_user_feed_dataframe(feed_df, "sum", period)
-    stacked_averages = stacked_agg_user_feed_dataframe(feed_df, "mean", period)
+    stacked_totals = stacked_agg_user_feed_dataframe(cohorts, "sum")
+    stacked_averages = stacked_agg_user_feed_dataframe(cohorts, "mean")
     top_liked_post_img, top_liked_post_count = get_most_liked_post(
-        feed_posts, USER_HANDLE
+        post_store, USER_HANDLE
     )
     top_bookmarked_post_img, top_bookmarked_post_count = get_most_bookmarked_post(
-        feed_posts, USER_HANDLE
+        post_store, USER_HANDLE
     )
     top_reposted_post_img, top_reposted_post_count = get_most_reposted_post(
-        feed_posts, USER_HANDLE
+        post_store, USER_HANDLE
     )
+    top_metric = request.args.get("top_metric", "like_count")
+    if top_metric not in TOP_POST_METRICS:
+        top_metric = "like_count"
+    top_period = request.args.get("top_period", "all")
+    if top_period not in TOP_POST_PERIODS:
+        top_period = "all"
+    top_posts = get_top_posts(post_store, USER_HANDLE, top_metric, 10, top_period)
     avg_likes_by_type = embed_type_agg_user_feed_dataframe(
-        feed_df, "average_likes", "like_count", "mean", period
+        cohorts, "like_count", "mean"
     )
-    post_engagement_by_post_day = agg_post_engagement_by_post_day(feed_df)
-    post_engagement_by_post_hour = agg_post_engagement_by_post_hour(feed_df)
+    feed_heatmap = get_feed_heatmap(feed_df, display_timezone())
+    post_engagement_by_post_day = agg_post_engagement_by_post_day(feed_heatmap)
+    post_engagement_by_post_hour = agg_post_engagement_by_post_hour(feed_heatmap)
     return render_template(
         "analytics.html",
         handle=handle,
@@ -226,6 +472,11 @@ def analytics():
         top_bookmarked_count=top_bookmarked_post_count,
         top_reposted_post_img=top_reposted_post_img,
         top_reposted_count=top_reposted_post_count,
+        top_posts=top_posts,
+        top_metric=top_metric,
+        top_period=top_period,
+        top_post_metrics=TOP_POST_METRICS,
+        top_post_periods=TOP_POST_PERIODS,
         total_likes=total_likes,
         avg_likes=avg_likes,
         total_posts=total_posts,
@@ -234,6 +485,7 @@ def analytics():
         average_likes_by_type=avg_likes_by_type,
         post_engagement_by_post_day=post_engagement_by_post_day,
         post_engagement_by_post_hour=post_engagement_by_post_hour,
+        data_age_seconds=refresher.age(*FEED_SOURCES),
     )
 
 
@@ -242,27 +494,165 @@ def engagement():
     return render_template("engagement.html")
 
 
+def audience_args() -> dict:
+    audience = {
+        "audience_limit": request.args.get("audience_limit", 15, type=int),
+        "audience_window": request.args.get("audience_window", 30, type=int),
+        "audience_sort": request.args.get("audience_sort", "total_engagement"),
+    }
+    if audience["audience_sort"] not in AUDIENCE_SORT_METRICS:
+        audience["audience_sort"] = "total_engagement"
+    # head() counts negative limits from the end, keep both in range
+    audience["audience_limit"] = min(
+        max(audience["audience_limit"], 1), MAX_AUDIENCE_LIMIT
+    )
+    audience["audience_window"] = max(audience["audience_window"], 1)
+    return audience
+
+
 @app.route("/engagement/likes-data", methods=["GET"])
 def engagement_likes_data():
     period = request.args.get("period", "month")  # default to month
-    feed_posts = get_user_feed()
-    likes_data = get_user_post_likes(feed_posts)
-    followers = get_user_followers()
-    follows = get_user_follows()
-    likes_df = get_likes_dataframe(likes_data, follows, followers)
-    reposts_data = get_user_post_reposts(feed_posts)
-    reposts_df = get_reposts_dataframe(reposts_data, follows, followers)
-    engagement_df = get_engagement_dataframe(feed_posts, likes_df, reposts_df)
-    engagement_over_time = agg_engagement_rate(engagement_df, period)
-    engagement_by_hour = agg_engagement_by_hour(engagement_df)
-    cohort_curves = cohort_curves_likes(engagement_df, period)
-    top_followers = get_top_followers(engagement_df, 15)
+    if period not in PERIOD_FREQUENCIES:
+        period = "month"
+    tz = display_timezone()
+    audience = audience_args()
+    if tz == DISPLAY_TIMEZONE and audience == DEFAULT_AUDIENCE:
+        payload = refresher.get("engagement_payloads")[period]
+    else:
+        payload = encode_payload(
+            engagement_payload(
+                get_current_engagement_dataframe(), period, tz, **audience
+            )
+        )
+    return payload_response(payload)
+
+
+@app.route("/engagement/likes-stream", methods=["GET"])
+def engagement_likes_stream():
+    """
+    NDJSON variant of likes-data: harvest progress while the sources load,
+    then every chart as soon as its inputs are ready. With default options
+    and a precomputed snapshot the stored response is replayed, with an ETag
+    like likes-data.
+    """
+    period = request.args.get("period", "month")  # default to month
+    if period not in PERIOD_FREQUENCIES:
+        period = "month"
+    tz = display_timezone()
+    audience = audience_args()
+    if (
+        tz == DISPLAY_TIMEZONE
+        and audience == DEFAULT_AUDIENCE
+        and refresher.built_at("engagement_payloads") is not None
+    ):
+        payload = refresher.get("engagement_payloads")[period]
+        # Snapshots built before the replay was stored alongside lack it
+        if "stream" in payload:
+            return payload_response(payload["stream"], "application/x-ndjson")
+
+    def events():
+        started = time.time()
+        executor = ThreadPoolExecutor(max_workers=len(ENGAGEMENT_SOURCES))
+        pending = {
+            executor.submit(refresher.get, name): name for name in ENGAGEMENT_SOURCES
+        }
+        sources, failed, reported = {}, set(), {}
+        emitted = False
+        try:
+            while pending or not emitted:
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        sources[name] = future.result()
+                        yield encode_event(
+                            "source",
+                            {
+                                "source": name,
+                                "ready": len(sources),
+                                "total": len(ENGAGEMENT_SOURCES),
+                                "seconds": round(time.time() - started, 2),
+                            },
+                        )
+                    except Exception as e:
+                        failed.add(name)
+                        yield encode_event("error", {"source": name, "error": str(e)})
+                for name in pending.values():
+                    progress = refresher.progress(name)
+                    if progress is not None and progress != reported.get(name):
+                        reported[name] = progress
+                        yield encode_event("progress", {"source": name, **progress})
+                if not emitted and CHART_SOURCES <= sources.keys():
+                    # These charts don't use the follow flags, so the graph can
+                    # wait; once it is ready too this is the memoized full frame
+                    emitted = True
+                    empty = GraphSnapshot("follows", datetime.now(timezone.utc), [], 0)
+                    engagement_df = get_engagement_dataframe(
+                        sources["user_feed"],
+                        sources["post_likes"],
+                        sources["post_reposts"],
+                        sources.get("user_follows", empty),
+                        sources.get("user_followers", empty),
+                    )
+                    for chart, build in ENGAGEMENT_CHARTS.items():
+                        yield encode_event(
+                            "chart",
+                            {
+                                "chart": chart,
+                                "payload": build(engagement_df, period, tz),
+                                "seconds": round(time.time() - started, 2),
+                            },
+                        )
+                elif not emitted and CHART_SOURCES & failed:
+                    break
+            if set(ENGAGEMENT_SOURCES) <= sources.keys():
+                yield encode_event(
+                    "chart",
+                    {
+                        "chart": "top_followers",
+                        "payload": get_top_followers(
+                            get_engagement_dataframe(
+                                sources["user_feed"],
+                                sources["post_likes"],
+                                sources["post_reposts"],
+                                sources["user_follows"],
+                                sources["user_followers"],
+                            ),
+                            audience["audience_limit"],
+                            audience["audience_window"],
+                            audience["audience_sort"],
+                        ),
+                        "seconds": round(time.time() - started, 2),
+                    },
+                )
+            yield encode_event(
+                "done",
+                {
+                    "data_built_at": refresher.built_at(*ENGAGEMENT_SOURCES),
+                    "seconds": round(time.time() - started, 2),
+                },
+            )
+        finally:
+            executor.shutdown(wait=False)
+
+    response = Response(stream_with_context(events()), mimetype="application/x-ndjson")
+    # Keep proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({"session": bluesky_session.stats(), "memo": memo_stats()})
+
+
+@app.route("/graph-diff", methods=["GET"])
+def graph_diff():
     return jsonify(
         {
-            "engagement_over_time": engagement_over_time,
-            "engagement_by_hour": engagement_by_hour,
-            "cohort_curves": cohort_curves,
-            "top_followers": top_followers,
+            "follows": graph_store.diff("follows"),
+            "followers": graph_store.diff("followers"),
         }
     )
 
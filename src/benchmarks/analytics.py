@@ -0,0 +1,402 @@
+"""
+Time and peak memory of the analytics functions on synthetic event logs.
+
+    python -m benchmarks.analytics [--sizes 1e3,1e5,1e7] [--cases a,b]
+        [--repeat N] [--save-baseline | --compare] [--threshold 0.25]
+        [--min-delta 0.01]
+
+--save-baseline writes the results to benchmarks/baselines/analytics.json,
+--compare checks them against it and exits with 1 when a case got slower or
+bigger by more than the threshold. Slowdowns under --min-delta seconds are
+ignored, small sizes finish in under a millisecond and time only noise.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from analytics.aggregations import (
+    ENGAGEMENT_TYPES,
+    PERIOD_FREQUENCIES,
+    agg_engagement_by_hour,
+    agg_engagement_rate,
+    agg_post_engagement_by_post_day,
+    agg_user_feed_dataframe,
+    build_feed_frame,
+    cohort_aggregates,
+    cohort_curves_likes,
+    cohort_curves_reposts,
+    embed_type_agg_user_feed_dataframe,
+    engagement_rate_windows,
+    stacked_agg_user_feed_dataframe,
+    weekday_hour_heatmap,
+)
+from analytics.engagement import (
+    get_engagement_df,
+    get_engagement_score,
+    get_top_followers,
+)
+from bluesky_client.feed_columns import EMBED_TYPES, FEED_COUNTERS
+from bluesky_client.graph_store import GraphSnapshot
+from bluesky_client.schemas.construct import record_type
+from bluesky_client.schemas.like import Like
+from bluesky_client.schemas.repost import Repost
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "analytics.json")
+SIZES = [1_000, 100_000, 10_000_000]
+USER_HANDLE = "benchmark.bsky.social"
+# Fixed so every run and every machine sees the same data
+END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HISTORY_DAYS = 3 * 365
+# Time differences below this are noise, not regressions: a scheduler hiccup
+# or a GC pause alone costs a few milliseconds
+MIN_TIME_DELTA = 0.01
+
+
+def _times(rng: np.random.Generator, n: int) -> np.ndarray:
+    # Nanoseconds since the epoch, spread over the last HISTORY_DAYS, in whole
+    # microseconds like the API's timestamps
+    start = int((END - timedelta(days=HISTORY_DAYS)).timestamp() * 1e6)
+    return np.sort(rng.integers(start, int(END.timestamp() * 1e6), n)) * 1000
+
+
+def _utc(ns: np.ndarray) -> pd.DatetimeIndex:
+    return pd.to_datetime(ns, unit="ns", utc=True)
+
+
+def synthetic_feed_df(n_posts: int, seed: int = 0) -> DataFrame:
+    """
+    A feed frame shaped like FeedColumns.to_dataframe(), one row per post.
+    """
+    rng = np.random.default_rng(seed)
+    data = {
+        "indexed_at": _utc(_times(rng, n_posts)),
+        "embed_type": pd.Categorical.from_codes(
+            rng.choice(len(EMBED_TYPES), n_posts, p=[0.7, 0.2, 0.1]), EMBED_TYPES
+        ),
+    }
+    means = {"like_count": 40, "reply_count": 3, "quote_count": 1}
+    means.update({"repost_count": 6, "bookmark_count": 2})
+    for column in FEED_COUNTERS:
+        data[column] = rng.poisson(means[column], n_posts).astype(np.int32)
+    return DataFrame(data)
+
+
+def synthetic_engagement_df(n_events: int, seed: int = 0) -> DataFrame:
+    """
+    An engagement frame shaped like get_engagement_df(): one post per hundred
+    events, likes and reposts arriving hours to days after their post, from
+    an audience whose most active members engage far more than the rest.
+    Strings come from shared pools, as they do after DataFrame.from_records.
+    """
+    rng = np.random.default_rng(seed)
+    n_posts = max(n_events // 100, 10)
+    n_engagements = max(n_events - n_posts, 0)
+    post_times = _times(rng, n_posts)
+    post_uris = np.array(
+        [f"at://did:plc:benchmark/app.bsky.feed.post/{i}" for i in range(n_posts)],
+        dtype=object,
+    )
+    audience = max(n_events // 20, 10)
+    handles = np.array([f"user{i}.bsky.social" for i in range(audience)], dtype=object)
+    dids = np.array([f"did:plc:user{i}" for i in range(audience)], dtype=object)
+    avatars = np.array(
+        [
+            f"https://cdn.example/avatar/{i}" if i % 10 else None
+            for i in range(audience)
+        ],
+        dtype=object,
+    )
+    post = rng.integers(0, n_posts, n_engagements)
+    delay = (rng.exponential(24, n_engagements) * 3.6e9).astype(np.int64) * 1000
+    member = (rng.zipf(1.5, n_engagements) - 1) % audience
+    types = np.where(rng.random(n_engagements) < 0.85, 1, 2)
+    df = DataFrame(
+        {
+            "post_uri": np.concatenate([post_uris[post], post_uris]),
+            "post_indexed_at": _utc(np.concatenate([post_times[post], post_times])),
+            "indexed_at": _utc(np.concatenate([post_times[post] + delay, post_times])),
+            "handle": np.concatenate(
+                [handles[member], np.full(n_posts, USER_HANDLE, dtype=object)]
+            ),
+            "avatar": np.concatenate(
+                [avatars[member], np.full(n_posts, None, dtype=object)]
+            ),
+            "did": np.concatenate([dids[member], np.full(n_posts, None, dtype=object)]),
+            "following": np.concatenate([member % 3 == 0, np.zeros(n_posts, bool)]),
+            "follower": np.concatenate([member % 2 == 0, np.zeros(n_posts, bool)]),
+            "type": np.array(ENGAGEMENT_TYPES, dtype=object)[
+                np.concatenate([types, np.zeros(n_posts, np.int64)])
+            ],
+        }
+    )
+    return df
+
+
+def synthetic_records(engagement_df: DataFrame) -> Dict:
+    # The trusted records get_engagement_df() is built from
+    records = {"like": [], "repost": []}
+    builders = {"like": record_type(Like), "repost": record_type(Repost)}
+    feed_posts, dids = [], set()
+    for row in engagement_df.itertuples(index=False):
+        if row.type == "post":
+            feed_posts.append(
+                SimpleNamespace(
+                    uri=row.post_uri,
+                    indexed_at=row.indexed_at.to_pydatetime(),
+                    author=SimpleNamespace(handle=USER_HANDLE),
+                )
+            )
+            continue
+        if row.follower:
+            dids.add(row.did)
+        records[row.type].append(
+            builders[row.type](
+                row.post_uri,
+                row.post_indexed_at.to_pydatetime(),
+                row.indexed_at.to_pydatetime(),
+                row.handle,
+                row.did,
+                row.avatar,
+            )
+        )
+    snapshot = GraphSnapshot("followers", END, dids, len(dids))
+    return {
+        "feed_posts": feed_posts,
+        "likes": records["like"],
+        "reposts": records["repost"],
+        "follows": GraphSnapshot("follows", END, [], 0),
+        "followers": snapshot,
+    }
+
+
+def period_aggregators(feed_frame: DataFrame) -> List[Dict]:
+    # Every chart of the analytics page, for every period
+    charts = []
+    for period in PERIOD_FREQUENCIES:
+        cohorts = cohort_aggregates(feed_frame, period)
+        charts += [
+            agg_user_feed_dataframe(cohorts, "like_count", "sum"),
+            stacked_agg_user_feed_dataframe(cohorts, "mean"),
+            embed_type_agg_user_feed_dataframe(cohorts, "like_count", "mean"),
+        ]
+    return charts
+
+
+# name -> (setup(size) returning the arguments, function, largest size or None)
+CASES: Dict[str, tuple] = {
+    "get_engagement_df": (
+        lambda n: synthetic_records(synthetic_engagement_df(n)),
+        lambda a: get_engagement_df(
+            a["feed_posts"],
+            a["likes"],
+            a["reposts"],
+            a["follows"],
+            a["followers"],
+            USER_HANDLE,
+        ),
+        # Python records of 1e7 events don't fit in memory next to the frame
+        1_000_000,
+    ),
+    "engagement_rate_windows": (
+        synthetic_engagement_df,
+        engagement_rate_windows,
+        None,
+    ),
+    "agg_engagement_rate": (
+        lambda n: engagement_rate_windows(synthetic_engagement_df(n)),
+        lambda rates: agg_engagement_rate(rates, "month"),
+        None,
+    ),
+    "cohort_curves_likes": (
+        synthetic_engagement_df,
+        lambda df: cohort_curves_likes(df, "month"),
+        None,
+    ),
+    "cohort_curves_reposts": (
+        synthetic_engagement_df,
+        lambda df: cohort_curves_reposts(df, "month"),
+        None,
+    ),
+    "get_top_followers": (synthetic_engagement_df, get_top_followers, None),
+    "agg_engagement_by_hour": (
+        synthetic_engagement_df,
+        lambda df: agg_engagement_by_hour(
+            weekday_hour_heatmap(df, "America/New_York", by="type")
+        ),
+        None,
+    ),
+    "build_feed_frame": (synthetic_feed_df, build_feed_frame, None),
+    "period_aggregators": (
+        lambda n: build_feed_frame(synthetic_feed_df(n)),
+        period_aggregators,
+        None,
+    ),
+    "get_engagement_score": (
+        synthetic_feed_df,
+        lambda df: get_engagement_score(df, 1_000, "quarter"),
+        None,
+    ),
+    "agg_post_engagement_by_post_day": (
+        synthetic_feed_df,
+        lambda df: agg_post_engagement_by_post_day(
+            weekday_hour_heatmap(df, "America/New_York", values=["like_count"])
+        ),
+        None,
+    ),
+}
+
+
+def measure(func: Callable, args, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(args)
+        timings.append(time.perf_counter() - start)
+    # Peak over a separate traced run, tracemalloc slows allocation down
+    tracemalloc.start()
+    func(args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"time_s": min(timings), "peak_mb": peak / 2**20}
+
+
+def run(cases: List[str], sizes: List[int], repeat: int) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    for name in cases:
+        setup, func, largest = CASES[name]
+        results[name] = {}
+        for size in sizes:
+            if largest is not None and size > largest:
+                continue
+            args = setup(size)
+            # One run is plenty once a single call takes seconds
+            results[name][str(size)] = measure(
+                func, args, repeat if size < 10_000_000 else 1
+            )
+            del args
+    return results
+
+
+def load_baseline() -> Optional[Dict]:
+    if not os.path.exists(BASELINE_PATH):
+        return None
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict[str, Dict]):
+    baseline = load_baseline() or {"results": {}}
+    for name, by_size in results.items():
+        baseline["results"].setdefault(name, {}).update(
+            {
+                size: {
+                    "time_s": round(result["time_s"], 6),
+                    "peak_mb": round(result["peak_mb"], 2),
+                }
+                for size, result in by_size.items()
+            }
+        )
+    baseline["machine"] = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "processor": platform.machine(),
+    }
+    os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+    with open(BASELINE_PATH, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(
+    results: Dict[str, Dict],
+    baseline: Dict,
+    threshold: float,
+    min_delta: float = MIN_TIME_DELTA,
+) -> List[str]:
+    regressions = []
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            before = baseline["results"].get(name, {}).get(size)
+            if before is None:
+                continue
+            for metric, floor in (("time_s", min_delta), ("peak_mb", 0.1)):
+                old, new = before[metric], result[metric]
+                if new - old > floor and new > old * (1 + threshold):
+                    regressions.append(
+                        f"{name} @ {size}: {metric} {old:.4g} -> {new:.4g} "
+                        f"(+{(new / old - 1) * 100 if old else float('inf'):.0f}%)"
+                    )
+    return regressions
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda v: [int(float(size)) for size in parse_list(v)],
+        default=SIZES,
+    )
+    parser.add_argument("--cases", type=parse_list, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save-baseline", action="store_true")
+    mode.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument(
+        "--min-delta", type=float, default=MIN_TIME_DELTA, help="seconds"
+    )
+    args = parser.parse_args()
+    # Cohorts are naive periods on purpose, pandas warns on every conversion
+    warnings.filterwarnings("ignore", message="Converting to Period")
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    baseline = load_baseline() if args.compare else None
+    if args.compare and baseline is None:
+        parser.error(f"no baseline at {BASELINE_PATH}, run with --save-baseline")
+    results = run(args.cases, args.sizes, args.repeat)
+    print(f"{'case':<32} {'events':>10} {'time':>10} {'peak':>11} {'vs base':>8}")
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            line = (
+                f"{name:<32} {int(size):>10} {result['time_s']:>9.4f}s "
+                f"{result['peak_mb']:>8.1f} MB"
+            )
+            before = (baseline or {}).get("results", {}).get(name, {}).get(size)
+            if before and before["time_s"]:
+                line += f" {result['time_s'] / before['time_s']:>7.2f}x"
+            print(line)
+
+    if args.save_baseline:
+        save_baseline(results)
+        print(f"Baseline written to {BASELINE_PATH}")
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
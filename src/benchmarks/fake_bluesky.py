@@ -0,0 +1,476 @@
+"""
+Local stand-in for the Bluesky XRPC endpoints the fetchers use, serving one
+synthetic account. Logging in with any password works.
+
+    python -m benchmarks.fake_bluesky [--port 8765] [--posts N] [--likes N]
+        [--reposts N] [--followers N] [--follows N] [--latency S]
+        [--page-size N] [--rate-limit LIMIT/WINDOW] [--error-rate P]
+"""
+
+import argparse
+import base64
+import multiprocessing
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import orjson
+
+ACCOUNT_DID = "did:plc:benchmarkaccount0000000"
+ACCOUNT_HANDLE = "benchmark.bsky.social"
+# Any password logs in, the tokens only have to decode
+SESSION_METHODS = {
+    "com.atproto.server.createSession",
+    "com.atproto.server.refreshSession",
+}
+# Every tenth post is text only and every seventh a reply, both get skipped
+TEXT_POST_EVERY = 10
+REPLY_EVERY = 7
+
+
+def _iso(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _split(total: int, n_posts: int) -> np.ndarray:
+    # Skewed like a real account: a few posts collect most of the engagement
+    if n_posts == 0:
+        return np.zeros(0, dtype=np.int64)
+    weights = 1.0 / (1 + np.arange(n_posts) % 50)
+    counts = np.floor(weights / weights.sum() * total).astype(np.int64)
+    counts[0] += total - counts.sum()
+    return counts
+
+
+class SyntheticAccount:
+    """
+    Deterministic account data generated page by page from item indexes, so
+    the server stays small whatever the account size. Post 0 is the newest.
+    """
+
+    def __init__(
+        self,
+        posts: int = 1_000,
+        likes: int = 100_000,
+        reposts: int = 10_000,
+        followers: int = 10_000,
+        follows: int = 1_000,
+        post_interval_hours: float = 2,
+    ):
+        self.n_posts = posts
+        self.n_followers = followers
+        self.n_follows = follows
+        self.like_counts = _split(likes, posts)
+        self.repost_counts = _split(reposts, posts)
+        self.newest = datetime.now(timezone.utc) - timedelta(hours=1)
+        self.post_interval = timedelta(hours=post_interval_hours)
+
+    def _post_index(self, uri: str) -> Optional[int]:
+        prefix = f"at://{ACCOUNT_DID}/app.bsky.feed.post/"
+        if not uri.startswith(prefix):
+            return None
+        try:
+            index = int(uri[len(prefix) :])
+        except ValueError:
+            return None
+        return index if 0 <= index < self.n_posts else None
+
+    def post_time(self, i: int) -> datetime:
+        return self.newest - i * self.post_interval
+
+    def actor(self, i: int) -> Dict:
+        return {
+            "did": f"did:plc:{i:024d}",
+            "handle": f"user{i}.bsky.social",
+            "displayName": f"User {i}",
+            "avatar": f"https://cdn.example/avatar/{i}",
+            "createdAt": "2023-01-01T00:00:00.000Z",
+        }
+
+    def session(self) -> Dict:
+        now = int(time.time())
+
+        def token(scope: str, lifetime: int) -> str:
+            parts = (
+                {"alg": "HS256", "typ": "JWT"},
+                {"scope": scope, "sub": ACCOUNT_DID, "iat": now, "exp": now + lifetime},
+            )
+            encoded = [base64.urlsafe_b64encode(orjson.dumps(part)) for part in parts]
+            return b".".join(part.rstrip(b"=") for part in encoded).decode() + ".sig"
+
+        return dict(
+            self.subject(),
+            accessJwt=token("com.atproto.access", 2 * 3600),
+            refreshJwt=token("com.atproto.refresh", 60 * 24 * 3600),
+        )
+
+    def subject(self) -> Dict:
+        return {"did": ACCOUNT_DID, "handle": ACCOUNT_HANDLE}
+
+    def post(self, i: int) -> Dict:
+        created = _iso(self.post_time(i))
+        record = {
+            "$type": "app.bsky.feed.post",
+            "text": f"Post {i} #photography #bluesky",
+            "createdAt": created,
+        }
+        if i % REPLY_EVERY == REPLY_EVERY - 1:
+            parent = {"uri": self.uri(i + 1), "cid": f"bafypost{i + 1}"}
+            record["reply"] = {"root": parent, "parent": parent}
+        post = {
+            "uri": self.uri(i),
+            "cid": f"bafypost{i}",
+            "author": self.subject(),
+            "record": record,
+            "indexedAt": created,
+            "likeCount": int(self.like_counts[i]),
+            "repostCount": int(self.repost_counts[i]),
+            "replyCount": i % 5,
+            "quoteCount": i % 3,
+            "bookmarkCount": i % 4,
+        }
+        if i % TEXT_POST_EVERY != TEXT_POST_EVERY - 1:
+            post["embed"] = {
+                "$type": "app.bsky.embed.images#view",
+                "images": [
+                    {
+                        "alt": "",
+                        "fullsize": f"https://cdn.example/full/{i}",
+                        "thumb": f"https://cdn.example/thumb/{i}",
+                    }
+                ],
+            }
+        return post
+
+    def uri(self, i: int) -> str:
+        return f"at://{ACCOUNT_DID}/app.bsky.feed.post/{i}"
+
+    def _engager(self, post: int, k: int) -> int:
+        # Engagement mostly comes from followers, sometimes from outside
+        audience = max(self.n_followers, 1)
+        return (post * 31 + k) % (audience + audience // 4)
+
+    def _event_time(self, post: int, k: int, count: int) -> str:
+        # Events of a post spread over its first week, newest first
+        spread = min(timedelta(days=7), self.newest - self.post_time(post))
+        step = spread / max(count, 1)
+        return _iso(self.post_time(post) + (count - k) * step)
+
+    def feed(self, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        end = min(offset + limit, self.n_posts)
+        return [{"post": self.post(i)} for i in range(offset, end)], self.n_posts
+
+    def likes(self, uri: str, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        post = self._post_index(uri)
+        total = 0 if post is None else int(self.like_counts[post])
+        likes = []
+        for k in range(offset, min(offset + limit, total)):
+            created = self._event_time(post, k, total)
+            likes.append(
+                {
+                    "actor": self.actor(self._engager(post, k)),
+                    "createdAt": created,
+                    "indexedAt": created,
+                }
+            )
+        return likes, total
+
+    def reposted_by(self, uri: str, offset: int, limit: int) -> Tuple[List, int]:
+        post = self._post_index(uri)
+        total = 0 if post is None else int(self.repost_counts[post])
+        actors = []
+        for k in range(offset, min(offset + limit, total)):
+            actor = self.actor(self._engager(post, k * 3))
+            actor["indexedAt"] = self._event_time(post, k, total)
+            actors.append(actor)
+        return actors, total
+
+    def followers(self, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        end = min(offset + limit, self.n_followers)
+        return [self.actor(i) for i in range(offset, end)], self.n_followers
+
+    def follows(self, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        # Every other follow is a follower, so mutuals exist
+        end = min(offset + limit, self.n_follows)
+        return [self.actor(i * 2) for i in range(offset, end)], self.n_follows
+
+    def profile(self) -> Dict:
+        return dict(
+            self.subject(),
+            followersCount=self.n_followers,
+            followsCount=self.n_follows,
+            postsCount=self.n_posts,
+            createdAt="2023-01-01T00:00:00.000Z",
+        )
+
+    def posts(self, uris: List[str]) -> List[Dict]:
+        indexes = [self._post_index(uri) for uri in uris]
+        return [self.post(i) for i in indexes if i is not None]
+
+
+class FakeBluesky(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering XRPC GETs for a SyntheticAccount.
+    Every response waits latency (+ up to jitter) seconds and pages are
+    capped at page_size. With rate_limit=(limit, window) requests beyond
+    limit per window get a 429 and every response carries ratelimit-*
+    headers like the real server; error_rate adds random 429s on top.
+    GET /_stats returns request counts, POST /_reset clears them.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        account: SyntheticAccount,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        page_size: int = 100,
+        rate_limit: Optional[Tuple[int, float]] = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__(address, XrpcHandler)
+        self.account = account
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._window_start = time.time()
+        self._window_used = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests: Dict[str, int] = {}
+            self.rate_limited = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "by_method": dict(self.requests),
+                "rate_limited": self.rate_limited,
+            }
+
+    def admit(self, method: str) -> Tuple[bool, Dict[str, str]]:
+        # Counts the request and decides whether it gets a 429
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            limited = self._random.random() < self.error_rate
+            headers = {}
+            if self.rate_limit is not None:
+                limit, window = self.rate_limit
+                now = time.time()
+                if now - self._window_start >= window:
+                    self._window_start = now
+                    self._window_used = 0
+                if self._window_used >= limit:
+                    limited = True
+                elif not limited:
+                    self._window_used += 1
+                headers = {
+                    "ratelimit-limit": str(limit),
+                    "ratelimit-remaining": str(limit - self._window_used),
+                    "ratelimit-reset": str(int(self._window_start + window)),
+                    "ratelimit-policy": f"{limit};w={int(window)}",
+                }
+            if limited:
+                self.rate_limited += 1
+            return limited, headers
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self._lock:
+                extra = self._random.random() * self.jitter
+            time.sleep(self.latency + extra)
+
+
+def _page(params: Dict[str, List[str]], page_size: int) -> Tuple[int, int]:
+    offset = int(params.get("cursor", ["0"])[0] or 0)
+    limit = int(params.get("limit", [str(page_size)])[0])
+    return offset, max(1, min(limit, page_size))
+
+
+def _cursor(offset: int, count: int, total: int) -> Optional[str]:
+    return str(offset + count) if offset + count < total else None
+
+
+class XrpcHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real server, so connection reuse is measured too
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes, don't let them wait on ACKs
+    disable_nagle_algorithm = True
+    server: FakeBluesky
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = orjson.dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/_reset":
+            self.server.reset_stats()
+            self._send(200, {})
+            return
+        method = urlparse(self.path).path.rsplit("/", 1)[-1]
+        if method not in SESSION_METHODS:
+            self._send(501, {"error": "MethodNotImplemented", "message": method})
+            return
+        limited, headers = self.server.admit(method)
+        if limited:
+            body = {"error": "RateLimitExceeded", "message": "Rate Limit Exceeded"}
+            self._send(429, body, headers)
+        else:
+            self._send(200, self.server.account.session(), headers)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/_stats":
+            self._send(200, self.server.stats())
+            return
+        method = url.path.rsplit("/", 1)[-1]
+        limited, headers = self.server.admit(method)
+        self.server.delay()
+        if limited:
+            body = {"error": "RateLimitExceeded", "message": "Rate Limit Exceeded"}
+            self._send(429, body, headers)
+            return
+        try:
+            body = self.respond(method, parse_qs(url.query))
+        except (KeyError, ValueError) as e:
+            self._send(400, {"error": "InvalidRequest", "message": str(e)}, headers)
+            return
+        if body is None:
+            self._send(501, {"error": "MethodNotImplemented", "message": method})
+        else:
+            self._send(200, body, headers)
+
+    def respond(self, method: str, params: Dict[str, List[str]]) -> Optional[Dict]:
+        account = self.server.account
+        offset, limit = _page(params, self.server.page_size)
+        if method == "app.bsky.feed.getAuthorFeed":
+            items, total = account.feed(offset, limit)
+            return {"feed": items, "cursor": _cursor(offset, len(items), total)}
+        if method == "app.bsky.feed.getLikes":
+            uri = params["uri"][0]
+            items, total = account.likes(uri, offset, limit)
+            cursor = _cursor(offset, len(items), total)
+            return {"uri": uri, "likes": items, "cursor": cursor}
+        if method == "app.bsky.feed.getRepostedBy":
+            uri = params["uri"][0]
+            items, total = account.reposted_by(uri, offset, limit)
+            cursor = _cursor(offset, len(items), total)
+            return {"uri": uri, "repostedBy": items, "cursor": cursor}
+        if method in ("app.bsky.graph.getFollowers", "app.bsky.graph.getFollows"):
+            kind = "followers" if method.endswith("Followers") else "follows"
+            items, total = getattr(account, kind)(offset, limit)
+            return {
+                "subject": account.subject(),
+                kind: items,
+                "cursor": _cursor(offset, len(items), total),
+            }
+        if method == "app.bsky.actor.getProfile":
+            return account.profile()
+        if method == "app.bsky.feed.getPosts":
+            return {"posts": account.posts(params.get("uris", []))}
+        return None
+
+
+def serve(port: int, account_options: Dict, server_options: Dict, ready=None):
+    server = FakeBluesky(
+        ("127.0.0.1", port), SyntheticAccount(**account_options), **server_options
+    )
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+@contextmanager
+def running(account_options: Dict, server_options: Dict) -> Iterator[str]:
+    """
+    Run the fake server in a child process, so its work doesn't share the
+    GIL or the memory being measured, and yield its base URL.
+    """
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve, args=(0, account_options, server_options, ready), daemon=True
+    )
+    process.start()
+    try:
+        port = ready.get(timeout=30)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.join()
+
+
+def parse_rate_limit(value: Optional[str]) -> Optional[Tuple[int, float]]:
+    if not value:
+        return None
+    limit, window = value.split("/")
+    return int(limit), float(window)
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--posts", type=int, default=1_000)
+    parser.add_argument("--likes", type=int, default=100_000)
+    parser.add_argument("--reposts", type=int, default=10_000)
+    parser.add_argument("--followers", type=int, default=10_000)
+    parser.add_argument("--follows", type=int, default=1_000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rate-limit", help="LIMIT/WINDOW, e.g. 3000/300 like Bluesky")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+
+
+def server_options(args: argparse.Namespace) -> Tuple[Dict, Dict]:
+    account = {
+        "posts": args.posts,
+        "likes": args.likes,
+        "reposts": args.reposts,
+        "followers": args.followers,
+        "follows": args.follows,
+    }
+    server = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "page_size": args.page_size,
+        "rate_limit": parse_rate_limit(args.rate_limit),
+        "error_rate": args.error_rate,
+    }
+    return account, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    account, server = server_options(args)
+    print(f"Serving {ACCOUNT_HANDLE} on http://127.0.0.1:{args.port}/xrpc")
+    serve(args.port, account, server)
+
+
+if __name__ == "__main__":
+    main()
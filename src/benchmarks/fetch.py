@@ -0,0 +1,224 @@
+"""
+Benchmark the fetch layer against the local fake Bluesky server.
+
+    python -m benchmarks.fetch [--cases feed,likes,reposts,follows,followers]
+        [--concurrency N] [--trusted] [--sync] [--no-memory] [server options]
+
+Server options are those of benchmarks.fake_bluesky (account sizes, latency,
+page size, rate limit, injected 429s). With --sync the store backed sync
+paths run twice on empty stores, so the cold and the incremental run can be
+compared.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import httpx
+from atproto import Client
+
+from benchmarks.fake_bluesky import (
+    ACCOUNT_DID,
+    ACCOUNT_HANDLE,
+    add_server_arguments,
+    running,
+    server_options,
+)
+from bluesky_client.engagement_store import EngagementStore
+from bluesky_client.get_author_feed import get_author_feed, sync_author_feed
+from bluesky_client.get_post_likes import get_post_likes
+from bluesky_client.get_post_reposts import get_post_reposts
+from bluesky_client.get_profile import get_followers, get_follows, sync_graph
+from bluesky_client.governor import GovernedRequest, RateLimitGovernor
+from bluesky_client.graph_store import GraphStore
+from bluesky_client.post_store import PostStore
+
+CASES = ["feed", "likes", "reposts", "follows", "followers"]
+
+
+def fetch_cases(args: argparse.Namespace, client: Callable[[], Client]) -> List:
+    """
+    (name, run) pairs of one pass; run(state) returns the number of records.
+    The likes and reposts cases harvest the posts the feed case returned.
+    """
+    trusted = args.trusted
+    workers = args.concurrency
+
+    def feed(state: Dict) -> int:
+        state["posts"] = get_author_feed(client(), ACCOUNT_DID, trusted=trusted)
+        return len(state["posts"])
+
+    def likes(state: Dict) -> int:
+        posts = state["posts"]
+        return len(
+            get_post_likes(
+                client(), posts, ACCOUNT_HANDLE, max_workers=workers, trusted=trusted
+            )
+        )
+
+    def reposts(state: Dict) -> int:
+        posts = state["posts"]
+        return len(
+            get_post_reposts(
+                client(), posts, ACCOUNT_HANDLE, max_workers=workers, trusted=trusted
+            )
+        )
+
+    def follows(state: Dict) -> int:
+        return len(get_follows(client(), ACCOUNT_DID, trusted=trusted))
+
+    def followers(state: Dict) -> int:
+        return len(get_followers(client(), ACCOUNT_DID, trusted=trusted))
+
+    runs = {
+        "feed": feed,
+        "likes": likes,
+        "reposts": reposts,
+        "follows": follows,
+        "followers": followers,
+    }
+    return [(name, runs[name]) for name in args.cases]
+
+
+def _store(state: Dict, name: str, store_class):
+    if name not in state:
+        state[name] = store_class(state["path"](name))
+    return state[name]
+
+
+def sync_cases(args: argparse.Namespace, client: Callable[[], Client]) -> List:
+    # Same cases through the store backed sync paths, a cold then a warm run
+    trusted = args.trusted
+    workers = args.concurrency
+    graph_counts = {"follows": args.follows, "followers": args.followers}
+
+    def feed(state: Dict) -> int:
+        store = _store(state, "post_store", PostStore)
+        state["posts"] = sync_author_feed(client(), ACCOUNT_DID, store, trusted=trusted)
+        return len(state["posts"])
+
+    def engagement(harvest: Callable) -> Callable[[Dict], int]:
+        def run(state: Dict) -> int:
+            store = _store(state, "engagement_store", EngagementStore)
+            events = harvest(
+                client(),
+                state["posts"],
+                ACCOUNT_HANDLE,
+                max_workers=workers,
+                store=store,
+                trusted=trusted,
+            )
+            return len(events)
+
+        return run
+
+    def graph(kind: str) -> Callable[[Dict], int]:
+        def run(state: Dict) -> int:
+            store = _store(state, "graph_store", GraphStore)
+            snapshot = sync_graph(
+                client(), ACCOUNT_DID, store, kind, graph_counts[kind]
+            )
+            return len(snapshot)
+
+        return run
+
+    runs = {
+        "feed": feed,
+        "likes": engagement(get_post_likes),
+        "reposts": engagement(get_post_reposts),
+        "follows": graph("follows"),
+        "followers": graph("followers"),
+    }
+    return [
+        (f"{name} ({attempt})", runs[name])
+        for attempt in ("cold", "warm")
+        for name in args.cases
+    ]
+
+
+def run_pass(
+    url: str, cases_of: Callable, args: argparse.Namespace, traced: bool
+) -> Dict[str, Dict]:
+    governors = []
+
+    def client() -> Client:
+        governor = RateLimitGovernor(args.concurrency, max_backoff=args.max_backoff)
+        governors.append(governor)
+        return Client(base_url=url, request=GovernedRequest(governor))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        state = {"path": lambda name: os.path.join(folder, f"{name}.db")}
+        for name, run in cases_of(args, client):
+            httpx.post(f"{url}/_reset")
+            governors.clear()
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            records = run(state)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if traced else 0
+            if traced:
+                tracemalloc.stop()
+            served = httpx.get(f"{url}/_stats").json()
+            results[name] = {
+                "records": records,
+                "wall_s": elapsed,
+                "requests": served["requests"],
+                "rate_limited": served["rate_limited"],
+                "retries": sum(g.retries for g in governors),
+                "throttled_s": sum(g.throttled_seconds for g in governors),
+                "peak_mb": peak / 2**20,
+            }
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict]:
+    account, server = server_options(args)
+    cases_of = sync_cases if args.sync else fetch_cases
+    with running(account, server) as url:
+        results = run_pass(url, cases_of, args, traced=False)
+        if args.memory:
+            # tracemalloc slows allocation down, so peaks come from a 2nd pass
+            traced = run_pass(url, cases_of, args, traced=True)
+            for name, result in results.items():
+                result["peak_mb"] = traced[name]["peak_mb"]
+    return results
+
+
+def parse_cases(value: str) -> List[str]:
+    cases = [case.strip() for case in value.split(",") if case.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown cases: {', '.join(unknown)}")
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=parse_cases, default=CASES)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-backoff", type=float, default=60)
+    parser.add_argument("--trusted", action="store_true")
+    parser.add_argument("--sync", action="store_true")
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    print(
+        f"{'case':<18} {'records':>9} {'wall':>9} {'requests':>9} {'429s':>6} "
+        f"{'retries':>8} {'throttled':>10} {'peak':>10}"
+    )
+    for name, result in run(args).items():
+        print(
+            f"{name:<18} {result['records']:>9} {result['wall_s']:>8.2f}s "
+            f"{result['requests']:>9} {result['rate_limited']:>6} "
+            f"{result['retries']:>8} {result['throttled_s']:>9.1f}s "
+            f"{result['peak_mb']:>7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
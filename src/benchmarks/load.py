@@ -0,0 +1,207 @@
+"""
+Load test the dashboard routes against the local fake Bluesky server.
+
+    python -m benchmarks.load [--routes /analytics,/gallery] [--concurrency 1,8,32]
+        [--requests N] [--timeout S] [server options]
+
+For every route and concurrency level the app is booted in a fresh process
+on empty stores and cache. A first wave of as many simultaneous requests as
+the concurrency level hits the cold cache-miss path; once the background
+refreshes have settled, --requests more measure the warm path. Server
+options are those of benchmarks.fake_bluesky.
+"""
+
+import argparse
+import csv
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_bluesky import (
+    ACCOUNT_HANDLE,
+    add_server_arguments,
+    running,
+    server_options,
+)
+
+ROUTES = [
+    "/analytics",
+    "/engagement/likes-data",
+    "/engagement/likes-stream",
+    "/gallery",
+    "/schedule",
+]
+SCHEDULE_COLUMNS = ["path", "text", "date", "status"]
+
+
+def _write_schedule(root: str, items: int):
+    folder = os.path.join(root, "src", "static", "schedule")
+    os.makedirs(folder)
+    with open(os.path.join(folder, "schedule.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(SCHEDULE_COLUMNS)
+        for i in range(items):
+            date = f"2025-01-{i % 28 + 1:02d} 09:00:00"
+            writer.writerow([f"uploads/photo{i}.jpg", f"Photo {i}", date, ""])
+    with open(os.path.join(folder, "rules.csv"), "w", newline="") as f:
+        csv.writer(f).writerow(["rule"])
+
+
+def _serve_app(environment: Dict[str, str], ready):
+    # config is read on import, so the environment has to be in place first
+    os.environ.update(environment)
+    from werkzeug.serving import make_server
+
+    # One access log line per request would drown the results
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    from app import app
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    ready.put(server.port)
+    server.serve_forever()
+
+
+@contextmanager
+def app_server(backend_url: str, schedule_items: int) -> Iterator[str]:
+    """
+    Boot the app in a child process, logged in to backend_url, with its
+    stores, cache and schedule in a temporary ROOT_DIR. Yields its URL.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        _write_schedule(root, schedule_items)
+        environment = {
+            "ROOT_DIR": root,
+            "CLIENT_USERNAME": ACCOUNT_HANDLE,
+            "CLIENT_PASSWORD": "load-test",
+            "BLUESKY_BASE_URL": backend_url,
+        }
+        ready = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_serve_app, args=(environment, ready), daemon=True
+        )
+        process.start()
+        try:
+            yield f"http://127.0.0.1:{ready.get(timeout=60)}"
+        finally:
+            process.terminate()
+            process.join()
+
+
+def fire(
+    client: httpx.Client, url: str, requests: int, concurrency: int
+) -> Tuple[List[float], int, float]:
+    # Latencies, failed requests and wall time of requests GETs
+    def get(_) -> Tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            ok = client.get(url).status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(get, range(requests)))
+    wall = time.perf_counter() - start
+    return [latency for latency, _ in results], sum(not ok for _, ok in results), wall
+
+
+def settle(backend_url: str, quiet: float = 1.0, limit: float = 300):
+    # Wait until the background refreshes stop calling the backend
+    deadline = time.time() + limit
+    last = None
+    while time.time() < deadline:
+        served = httpx.get(f"{backend_url}/_stats").json()["requests"]
+        if served == last:
+            return
+        last = served
+        time.sleep(quiet)
+
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict:
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": max(latencies) * 1000,
+        "throughput": len(latencies) / wall if wall else 0.0,
+    }
+
+
+def run(args: argparse.Namespace) -> List[Dict]:
+    account, server = server_options(args)
+    results = []
+    with running(account, server) as backend_url:
+        for route in args.routes:
+            for concurrency in args.concurrency:
+                httpx.post(f"{backend_url}/_reset")
+                with app_server(backend_url, args.schedule_items) as app_url:
+                    limits = httpx.Limits(max_connections=concurrency)
+                    with httpx.Client(timeout=args.timeout, limits=limits) as client:
+                        url = app_url + route
+                        cold = summarize(*fire(client, url, concurrency, concurrency))
+                        settle(backend_url)
+                        backend = httpx.get(f"{backend_url}/_stats").json()
+                        warm = summarize(*fire(client, url, args.requests, concurrency))
+                results.append(
+                    {
+                        "route": route,
+                        "concurrency": concurrency,
+                        "cold": cold,
+                        "warm": warm,
+                        "backend_requests": backend["requests"],
+                    }
+                )
+    return results
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--routes", type=parse_list, default=ROUTES)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda v: [int(level) for level in parse_list(v)],
+        default=[1, 8, 32],
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds")
+    parser.add_argument("--schedule-items", type=int, default=50)
+    add_server_arguments(parser)
+    # A small account by default, every run starts with a full harvest
+    parser.set_defaults(posts=300, likes=30_000, reposts=3_000, followers=3_000)
+    args = parser.parse_args()
+    print(
+        f"{'route':<24} {'conc':>4} {'phase':<5} {'reqs':>5} {'errors':>6} "
+        f"{'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'req/s':>8} {'backend':>8}"
+    )
+    for result in run(args):
+        for phase in ("cold", "warm"):
+            stats = result[phase]
+            backend = result["backend_requests"] if phase == "cold" else ""
+            print(
+                f"{result['route']:<24} {result['concurrency']:>4} {phase:<5} "
+                f"{stats['requests']:>5} {stats['errors']:>6} "
+                f"{stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms "
+                f"{stats['p99_ms']:>7.1f}ms {stats['max_ms']:>7.1f}ms "
+                f"{stats['throughput']:>8.1f} {backend:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Compare validated and trusted record construction on synthetic API data.
+
+    python -m benchmarks.records [--posts N] [--likes N]
+"""
+
+import argparse
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Dict
+
+from bluesky_client.get_author_feed import parse_author, parse_embed, parse_record
+from bluesky_client.get_profile import parse_follower
+from bluesky_client.schemas.construct import as_dict, build_record
+from bluesky_client.schemas.like import Like
+from bluesky_client.schemas.post import Post
+
+
+def fake_post(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        uri=f"at://did:plc:author/app.bsky.feed.post/{i}",
+        author=SimpleNamespace(handle="author.bsky.social"),
+        indexed_at=f"2024-05-{i % 28 + 1:02d}T12:{i % 60:02d}:00.000Z",
+        record=SimpleNamespace(text=f"Post {i} #photography #bluesky", reply=None),
+        embed=SimpleNamespace(
+            py_type="app.bsky.embed.images#view",
+            images=[
+                SimpleNamespace(fullsize=f"https://cdn/{i}", thumb=f"https://t/{i}")
+            ],
+        ),
+        like_count=i % 97,
+        quote_count=i % 3,
+        reply_count=i % 7,
+        repost_count=i % 11,
+        bookmarkCount=i % 5,
+    )
+
+
+def fake_like(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        indexed_at=f"2024-05-{i % 28 + 1:02d}T13:{i % 60:02d}:00.000Z",
+        actor=SimpleNamespace(
+            did=f"did:plc:{i:024d}",
+            handle=f"user{i}.bsky.social",
+            avatar=f"https://cdn/avatar/{i}",
+            display_name=f"User {i}",
+            indexed_at=None,
+            created_at="2023-01-01T00:00:00.000Z",
+        ),
+    )
+
+
+def build_posts(posts, trusted: bool):
+    return [
+        build_record(
+            Post,
+            trusted,
+            uri=post.uri,
+            author=parse_author(post.author, trusted),
+            indexed_at=post.indexed_at,
+            record=parse_record(post.record, trusted),
+            embed=parse_embed(post.embed, trusted),
+            like_count=post.like_count,
+            quote_count=post.quote_count,
+            reply_count=post.reply_count,
+            repost_count=post.repost_count,
+            bookmark_count=post.bookmarkCount,
+        )
+        for post in posts
+    ]
+
+
+def build_likes(likes, trusted: bool):
+    return [
+        build_record(
+            Like,
+            trusted,
+            post_uri="at://did:plc:author/app.bsky.feed.post/0",
+            post_indexed_at="2024-05-01T12:00:00.000Z",
+            indexed_at=like.indexed_at,
+            handle=like.actor.handle,
+            did=like.actor.did,
+            avatar=like.actor.avatar,
+        )
+        for like in likes
+    ]
+
+
+def build_followers(likes, trusted: bool):
+    return [parse_follower(like.actor, i, trusted) for i, like in enumerate(likes)]
+
+
+def best_of(func: Callable, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def retained_bytes(func: Callable) -> int:
+    tracemalloc.start()
+    records = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def run(n_posts: int, n_likes: int) -> Dict[str, Dict[str, float]]:
+    posts = [fake_post(i) for i in range(n_posts)]
+    likes = [fake_like(i) for i in range(n_likes)]
+    cases = {
+        "posts": (build_posts, posts),
+        "likes": (build_likes, likes),
+        "followers": (build_followers, likes),
+    }
+    results = {}
+    for name, (build, data) in cases.items():
+        # Both paths have to produce the same field values
+        sample = zip(build(data[:100], False), build(data[:100], True))
+        assert all(as_dict(a) == as_dict(b) for a, b in sample), name
+        validated = best_of(lambda: build(data, False))
+        trusted = best_of(lambda: build(data, True))
+        results[name] = {
+            "records": len(data),
+            "validated_s": validated,
+            "trusted_s": trusted,
+            "speedup": validated / trusted if trusted else float("inf"),
+            "validated_mb": retained_bytes(lambda: build(data, False)) / 2**20,
+            "trusted_mb": retained_bytes(lambda: build(data, True)) / 2**20,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=5_000)
+    parser.add_argument("--likes", type=int, default=50_000)
+    args = parser.parse_args()
+    print(
+        f"{'case':<10} {'records':>8} {'validated':>10} {'trusted':>10} "
+        f"{'speedup':>8} {'validated':>11} {'trusted':>10}"
+    )
+    for name, result in run(args.posts, args.likes).items():
+        print(
+            f"{name:<10} {result['records']:>8} {result['validated_s']:>9.3f}s "
+            f"{result['trusted_s']:>9.3f}s {result['speedup']:>7.1f}x "
+            f"{result['validated_mb']:>8.1f} MB {result['trusted_mb']:>7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Union
+
+from bluesky_client.post_store import _to_utc_iso
+from bluesky_client.schemas.construct import build_record
+from bluesky_client.schemas.like import Like
+from bluesky_client.schemas.repost import Repost
+from bluesky_client.sqlite_store import SqliteStore
+
+EVENT_MODELS = {"like": Like, "repost": Repost}
+
+
+class EngagementStore(SqliteStore):
+    """
+    SQLite backed store of likes and reposts plus a per-post harvest state:
+    the post's counter when it was last harvested.
+    """
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                kind TEXT NOT NULL,
+                post_uri TEXT NOT NULL,
+                did TEXT NOT NULL,
+                handle TEXT NOT NULL,
+                avatar TEXT,
+                post_indexed_at TEXT NOT NULL,
+                indexed_at TEXT NOT NULL,
+                PRIMARY KEY (kind, post_uri, did)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS harvest_state (
+                kind TEXT NOT NULL,
+                post_uri TEXT NOT NULL,
+                seen_count INTEGER NOT NULL,
+                PRIMARY KEY (kind, post_uri)
+            )
+            """
+        )
+
+    def get_state(self, kind: str, post_uri: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT seen_count FROM harvest_state "
+                "WHERE kind = ? AND post_uri = ?",
+                (kind, post_uri),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def known_dids(self, kind: str, post_uri: str) -> Set[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT did FROM events WHERE kind = ? AND post_uri = ?",
+                (kind, post_uri),
+            )
+            return {row["did"] for row in rows}
+
+    def add_events(
+        self,
+        kind: str,
+        post_uri: str,
+        events: List[Union[Like, Repost]],
+        seen_count: int,
+        replace: bool = False,
+    ) -> int:
+        # Returns how many events of the post are stored afterwards
+        with self._connect() as conn:
+            if replace:
+                conn.execute(
+                    "DELETE FROM events WHERE kind = ? AND post_uri = ?",
+                    (kind, post_uri),
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO events (kind, post_uri, did, handle, "
+                "avatar, post_indexed_at, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        kind,
+                        event.post_uri,
+                        event.did,
+                        event.handle,
+                        event.avatar,
+                        _to_utc_iso(event.post_indexed_at),
+                        _to_utc_iso(event.indexed_at),
+                    )
+                    for event in events
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO harvest_state "
+                "(kind, post_uri, seen_count) VALUES (?, ?, ?)",
+                (kind, post_uri, seen_count),
+            )
+            return conn.execute(
+                "SELECT COUNT(*) FROM events WHERE kind = ? AND post_uri = ?",
+                (kind, post_uri),
+            ).fetchone()[0]
+
+    def get_events(
+        self, kind: str, post_uris: List[str], trusted: bool = False
+    ) -> List[Union[Like, Repost]]:
+        model = EVENT_MODELS[kind]
+        order = {uri: i for i, uri in enumerate(post_uris)}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT post_uri, did, handle, avatar, post_indexed_at, indexed_at "
+                "FROM events WHERE kind = ? ORDER BY post_uri, indexed_at DESC",
+                (kind,),
+            ).fetchall()
+        rows = sorted(
+            (row for row in rows if row["post_uri"] in order),
+            key=lambda row: order[row["post_uri"]],
+        )
+        return [
+            build_record(
+                model,
+                trusted,
+                post_uri=row["post_uri"],
+                post_indexed_at=datetime.fromisoformat(row["post_indexed_at"]),
+                indexed_at=datetime.fromisoformat(row["indexed_at"]),
+                handle=row["handle"],
+                did=row["did"],
+                avatar=row["avatar"],
+            )
+            for row in rows
+        ]
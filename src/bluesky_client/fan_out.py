@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from atproto.exceptions import AtProtocolError
+
+from bluesky_client.session import is_auth_error
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _isolated(fetch: Callable[[T], List[R]], item: T) -> List[R]:
+    try:
+        return fetch(item)
+    except AtProtocolError as e:
+        # A rejected session fails every item, the caller has to log in again
+        if is_auth_error(e):
+            raise
+        print(f"Harvest failed for {getattr(item, 'uri', item)} — {e}")
+        return []
+    except Exception as e:
+        # One bad post should not abort the whole harvest
+        print(f"Harvest failed for {getattr(item, 'uri', item)} — {e}")
+        return []
+
+
+def fan_out(
+    fetch: Callable[[T], List[R]],
+    items: Iterable[T],
+    max_workers: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[R]:
+    """
+    Run fetch for every item with at most max_workers in flight and flatten
+    the results. Output keeps the order of items regardless of which request
+    finishes first. progress(done, total) is called as each item finishes.
+    """
+    items = list(items)
+    done = 0
+    lock = Lock()
+
+    def run(item: T) -> List[R]:
+        nonlocal done
+        result = _isolated(fetch, item)
+        if progress is not None:
+            with lock:
+                done += 1
+                progress(done, len(items))
+        return result
+
+    if max_workers <= 1:
+        results = [run(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run, items))
+    return [record for batch in results for record in batch]
@@ -0,0 +1,43 @@
+from array import array
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+EMBED_TYPES = ["images", "video", "other"]
+# In the column order of the feed DataFrame
+FEED_COUNTERS = [
+    "like_count",
+    "reply_count",
+    "quote_count",
+    "repost_count",
+    "bookmark_count",
+]
+
+
+class FeedColumns:
+    """
+    Typed column buffers for the feed DataFrame, filled straight from store
+    rows without building a model object per post.
+    """
+
+    def __init__(self):
+        self.indexed_at = []
+        self.embed_type = []
+        self.counters = {column: array("i") for column in FEED_COUNTERS}
+
+    def append(self, indexed_at: str, embed_type: str, counts: Iterable[int]):
+        self.indexed_at.append(indexed_at)
+        self.embed_type.append(embed_type)
+        for column, count in zip(FEED_COUNTERS, counts):
+            self.counters[column].append(count or 0)
+
+    def to_dataframe(self) -> DataFrame:
+        data = {
+            "indexed_at": pd.to_datetime(self.indexed_at, utc=True, format="ISO8601"),
+            "embed_type": pd.Categorical(self.embed_type, categories=EMBED_TYPES),
+        }
+        for column in FEED_COUNTERS:
+            data[column] = np.frombuffer(self.counters[column], dtype=np.int32)
+        return DataFrame(data)
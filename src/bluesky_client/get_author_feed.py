@@ -1,8 +1,12 @@
 import re
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
 
 from atproto import Client
 
+from bluesky_client.paginate import MAX_PAGE_SIZE, paginate
+from bluesky_client.post_store import PostStore
+from bluesky_client.schemas.construct import build_record
 from bluesky_client.schemas.post import Author, BskyRecord, Embed, Post
 
 
@@ -11,81 +15,131 @@ def find_tags(text: str) -> List[str]:
     return [tag[1:] for tag in re.findall(pattern, text)]
 
 
-def parse_author(author) -> Author:
-    return Author(handle=author.handle)
+def parse_author(author, trusted: bool = False) -> Author:
+    return build_record(Author, trusted, handle=author.handle)
 
 
-def parse_record(record) -> BskyRecord:
-    return BskyRecord(
+def parse_record(record, trusted: bool = False) -> BskyRecord:
+    return build_record(
+        BskyRecord,
+        trusted,
         text=record.text,
         tags=find_tags(record.text),
     )
 
 
-def parse_embed(embed) -> Embed:
+def parse_embed(embed, trusted: bool = False) -> Embed:
     try:
         embed_type = embed.py_type
         # Can post multiple images
         if embed_type == "app.bsky.embed.images#view":
-            return Embed(
+            return build_record(
+                Embed,
+                trusted,
                 resource=embed.images[0].fullsize,
                 thumbnail=embed.images[0].thumb,
                 embed_type="images",
             )
         elif embed_type == "app.bsky.embed.video#view":
-            return Embed(
+            return build_record(
+                Embed,
+                trusted,
                 resource=embed.playlist,
                 thumbnail=embed.thumbnail,
                 embed_type="video",
             )
         else:
-            return Embed(
+            return build_record(
+                Embed,
+                trusted,
                 resource="",
                 thumbnail="",
                 embed_type="other",
             )
     except AttributeError:
-        return Embed(
+        return build_record(
+            Embed,
+            trusted,
             resource="",
             thumbnail="",
             embed_type="other",
         )
 
 
-def get_author_feed(client: Client, client_did: str, limit: int = 30) -> List[Post]:
-    cursor = None
+def get_author_feed(
+    client: Client,
+    client_did: str,
+    limit: int = MAX_PAGE_SIZE,
+    stop_when: Optional[Callable] = None,
+    trusted: bool = False,
+) -> List[Post]:
     cleaned_data = []
-    while True:
-        data = client.get_author_feed(
+    feed = paginate(
+        lambda cursor: client.get_author_feed(
             actor=client_did,
             filter="posts_and_author_threads",
             limit=limit,
             cursor=cursor,
+        ),
+        "feed",
+        stop_when=stop_when,
+    )
+    for item in feed:
+        # reply = item.reply
+        # reason = item.reason
+        post = item.post
+        parsed_post = build_record(
+            Post,
+            trusted,
+            uri=post.uri,
+            author=parse_author(post.author, trusted),
+            indexed_at=post.indexed_at,
+            record=parse_record(post.record, trusted),
+            embed=parse_embed(post.embed, trusted),
+            like_count=post.like_count,
+            quote_count=post.quote_count,
+            reply_count=post.reply_count,
+            repost_count=post.repost_count,
+            bookmark_count=post.bookmarkCount,
         )
-        if not data.feed:
-            break
-        for item in data.feed:
-            # reply = item.reply
-            # reason = item.reason
-            post = item.post
-            parsed_post = Post(
-                uri=post.uri,
-                author=parse_author(post.author),
-                indexed_at=post.indexed_at,
-                record=parse_record(post.record),
-                embed=parse_embed(post.embed),
-                like_count=post.like_count,
-                quote_count=post.quote_count,
-                reply_count=post.reply_count,
-                repost_count=post.repost_count,
-                bookmark_count=post.bookmarkCount,
-            )
-            # Ignore text posts
-            if parsed_post.embed.embed_type != "other":
-                # Only main posts and not replies
-                if not post.record.reply:
-                    cleaned_data.append(parsed_post)
-        cursor = data.cursor
-        if not cursor:
-            break
+        # Ignore text posts
+        if parsed_post.embed.embed_type != "other":
+            # Only main posts and not replies
+            if not post.record.reply:
+                cleaned_data.append(parsed_post)
     return cleaned_data
+
+
+def sync_author_feed(
+    client: Client,
+    client_did: str,
+    store: PostStore,
+    freshness_days: int = 3,
+    full: bool = False,
+    trusted: bool = False,
+) -> List[Post]:
+    """
+    Refresh the local post store and return every stored post.
+    Posts newer than freshness_days are always re-read so their counters stay
+    current; paging stops at the first already stored original post (not a
+    repost) older than that.
+    A full sync re-reads the whole feed and drops deleted posts from the store.
+    """
+    known_uris = set() if full else store.uris()
+    horizon = datetime.now(timezone.utc) - timedelta(days=freshness_days)
+
+    def is_synced(item) -> bool:
+        # A repost brings an old post back to the top, only originals are in order
+        if item.reason is not None:
+            return False
+        post = item.post
+        return (
+            post.uri in known_uris and datetime.fromisoformat(post.indexed_at) < horizon
+        )
+
+    posts = get_author_feed(client, client_did, stop_when=is_synced, trusted=trusted)
+    if full:
+        store.replace(posts)
+    else:
+        store.upsert(posts)
+    return store.all_posts(trusted)
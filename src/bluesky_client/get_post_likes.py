@@ -1,37 +1,94 @@
-import time
-from typing import List
+from typing import Callable, List, Optional
 
 from atproto import Client
 
+from bluesky_client.engagement_store import EngagementStore
+from bluesky_client.fan_out import fan_out
+from bluesky_client.paginate import MAX_PAGE_SIZE, paginate
+from bluesky_client.schemas.construct import build_record
 from bluesky_client.schemas.like import Like
 
 
+def get_likes_for_post(
+    client: Client,
+    item,
+    limit: int = MAX_PAGE_SIZE,
+    stop_when: Optional[Callable] = None,
+    trusted: bool = False,
+) -> List[Like]:
+    likes = paginate(
+        lambda cursor: client.get_likes(uri=item.uri, limit=limit, cursor=cursor),
+        "likes",
+        stop_when=stop_when,
+    )
+    return [
+        build_record(
+            Like,
+            trusted,
+            post_uri=item.uri,
+            post_indexed_at=item.indexed_at,
+            indexed_at=like.indexed_at,
+            handle=like.actor.handle,
+            did=like.actor.did,
+            avatar=like.actor.avatar,
+        )
+        for like in likes
+    ]
+
+
+def sync_likes_for_post(
+    client: Client,
+    store: EngagementStore,
+    item,
+    limit: int = MAX_PAGE_SIZE,
+    trusted: bool = False,
+) -> List[Like]:
+    state = store.get_state("like", item.uri)
+    if state is not None and state["seen_count"] == item.like_count:
+        return []
+    # Unlikes can't be spotted from the newest likes, so re-read the post
+    full = state is None or item.like_count < state["seen_count"]
+    known_dids = set() if full else store.known_dids("like", item.uri)
+    likes = get_likes_for_post(
+        client,
+        item,
+        limit,
+        stop_when=lambda like: like.actor.did in known_dids,
+        trusted=trusted,
+    )
+    stored = store.add_events("like", item.uri, likes, item.like_count, replace=full)
+    # Deleted or blocked accounts keep stored and counted apart for good, so
+    # only a change the new events don't explain means a missed removal
+    counted = item.like_count - state["seen_count"] if not full else 0
+    if not full and stored - len(known_dids) != counted:
+        # A removal hidden by newer additions, the store lost count, re-read it
+        likes = get_likes_for_post(client, item, limit, trusted=trusted)
+        store.add_events("like", item.uri, likes, item.like_count, replace=True)
+    return likes
+
+
 def get_post_likes(
-    client: Client, user_feed: list, user_handle: str, limit: int = 100
+    client: Client,
+    user_feed: list,
+    user_handle: str,
+    limit: int = MAX_PAGE_SIZE,
+    max_workers: int = 1,
+    store: Optional[EngagementStore] = None,
+    trusted: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
 ) -> List[Like]:
-    cleaned_data = []
-    for item in user_feed:
-        if item.author.handle != user_handle:
-            continue
-        cursor = None
-        while True:
-            data = client.get_likes(
-                uri=item.uri,
-                limit=limit,
-                cursor=cursor,
-            )
-            if not data.likes:
-                break
-            for like in data.likes:
-                parsed_like = Like(
-                    post_uri=item.uri,
-                    post_indexed_at=item.indexed_at,
-                    indexed_at=like.indexed_at,
-                    handle=like.actor.handle,
-                    avatar=like.actor.avatar,
-                )
-                cleaned_data.append(parsed_like)
-            cursor = data.cursor
-            if not cursor:
-                break
-    return cleaned_data
+    posts = [item for item in user_feed if item.author.handle == user_handle]
+    if store is None:
+        return fan_out(
+            lambda item: get_likes_for_post(client, item, limit, trusted=trusted),
+            posts,
+            max_workers,
+            progress,
+        )
+    fan_out(
+        lambda item: sync_likes_for_post(client, store, item, limit, trusted),
+        posts,
+        max_workers,
+        progress,
+    )
+    return store.get_events("like", [item.uri for item in posts], trusted)
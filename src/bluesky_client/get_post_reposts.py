@@ -1,41 +1,101 @@
-import time
-from typing import List
+from typing import Callable, List, Optional
 
 from atproto import Client
-from pydantic import ValidationError
 
+from bluesky_client.engagement_store import EngagementStore
+from bluesky_client.fan_out import fan_out
+from bluesky_client.paginate import MAX_PAGE_SIZE, paginate
+from bluesky_client.schemas.construct import build_record
 from bluesky_client.schemas.repost import Repost
 
 
-def get_post_reposts(
-    client: Client, user_feed: list, user_handle: str, limit: int = 100
+def get_reposts_for_post(
+    client: Client,
+    item,
+    limit: int = MAX_PAGE_SIZE,
+    stop_when: Optional[Callable] = None,
+    trusted: bool = False,
 ) -> List[Repost]:
+    reposts = paginate(
+        lambda cursor: client.get_reposted_by(uri=item.uri, limit=limit, cursor=cursor),
+        "reposted_by",
+        stop_when=stop_when,
+    )
     cleaned_data = []
-    for item in user_feed:
-        if item.author.handle != user_handle:
-            continue
-        cursor = None
-        while True:
-            data = client.get_reposted_by(
-                uri=item.uri,
-                limit=limit,
-                cursor=cursor,
+    for repost in reposts:
+        try:
+            parsed_repost = build_record(
+                Repost,
+                trusted,
+                post_uri=item.uri,
+                post_indexed_at=item.indexed_at,
+                indexed_at=repost.indexed_at,
+                handle=repost.handle,
+                did=repost.did,
+                avatar=repost.avatar,
             )
-            if not data.reposted_by:
-                break
-            for repost in data.reposted_by:
-                try:
-                    parsed_repost = Repost(
-                        post_uri=item.uri,
-                        post_indexed_at=item.indexed_at,
-                        indexed_at=repost.indexed_at,
-                        handle=repost.handle,
-                        avatar=repost.avatar,
-                    )
-                    cleaned_data.append(parsed_repost)
-                except ValidationError:
-                    pass
-            cursor = data.cursor
-            if not cursor:
-                break
+            cleaned_data.append(parsed_repost)
+        except ValueError:
+            # pydantic's ValidationError is a ValueError too
+            pass
     return cleaned_data
+
+
+def sync_reposts_for_post(
+    client: Client,
+    store: EngagementStore,
+    item,
+    limit: int = MAX_PAGE_SIZE,
+    trusted: bool = False,
+) -> List[Repost]:
+    state = store.get_state("repost", item.uri)
+    if state is not None and state["seen_count"] == item.repost_count:
+        return []
+    # Removed reposts can't be spotted from the newest ones, so re-read the post
+    full = state is None or item.repost_count < state["seen_count"]
+    known_dids = set() if full else store.known_dids("repost", item.uri)
+    reposts = get_reposts_for_post(
+        client,
+        item,
+        limit,
+        stop_when=lambda repost: repost.did in known_dids,
+        trusted=trusted,
+    )
+    stored = store.add_events(
+        "repost", item.uri, reposts, item.repost_count, replace=full
+    )
+    # Deleted or blocked accounts keep stored and counted apart for good, so
+    # only a change the new events don't explain means a missed removal
+    counted = item.repost_count - state["seen_count"] if not full else 0
+    if not full and stored - len(known_dids) != counted:
+        # A removal hidden by newer additions, the store lost count, re-read it
+        reposts = get_reposts_for_post(client, item, limit, trusted=trusted)
+        store.add_events("repost", item.uri, reposts, item.repost_count, replace=True)
+    return reposts
+
+
+def get_post_reposts(
+    client: Client,
+    user_feed: list,
+    user_handle: str,
+    limit: int = MAX_PAGE_SIZE,
+    max_workers: int = 1,
+    store: Optional[EngagementStore] = None,
+    trusted: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[Repost]:
+    posts = [item for item in user_feed if item.author.handle == user_handle]
+    if store is None:
+        return fan_out(
+            lambda item: get_reposts_for_post(client, item, limit, trusted=trusted),
+            posts,
+            max_workers,
+            progress,
+        )
+    fan_out(
+        lambda item: sync_reposts_for_post(client, store, item, limit, trusted),
+        posts,
+        max_workers,
+        progress,
+    )
+    return store.get_events("repost", [item.uri for item in posts], trusted)
@@ -1,7 +1,11 @@
+from datetime import datetime, timezone
 from typing import List
 
 from atproto import Client
 
+from bluesky_client.graph_store import GraphSnapshot, GraphStore
+from bluesky_client.paginate import MAX_PAGE_SIZE, paginate
+from bluesky_client.schemas.construct import build_record
 from bluesky_client.schemas.profile import Follower, Profile
 
 
@@ -16,59 +20,71 @@ def get_profile(client: Client, client_did: str) -> Profile:
     )
 
 
-def get_follows(client, client_did: str, limit: int = 30) -> List[Follower]:
-    cursor = None
-    cleaned_data = []
-    i = 0
-    while True:
-        data = client.get_follows(
-            actor=client_did,
-            limit=limit,
-            cursor=cursor,
-        )
-        if not data.follows:
-            break
-        for profile in data.follows:
-            follows_data = Follower(
-                did=profile.did,
-                handle=profile.handle,
-                display_name=profile.display_name,
-                indexed_at=profile.indexed_at,
-                created_at=profile.created_at,
-                follow_index=i,
-            )
-            i += 1
-            cleaned_data.append(follows_data)
-        cursor = data.cursor
-        if not cursor:
-            break
-    return cleaned_data
+def parse_follower(profile, follow_index: int, trusted: bool = False) -> Follower:
+    return build_record(
+        Follower,
+        trusted,
+        did=profile.did,
+        handle=profile.handle,
+        display_name=profile.display_name,
+        indexed_at=profile.indexed_at,
+        created_at=profile.created_at,
+        follow_index=follow_index,
+    )
+
+
+def get_follows(
+    client, client_did: str, limit: int = MAX_PAGE_SIZE, trusted: bool = False
+) -> List[Follower]:
+    follows = paginate(
+        lambda cursor: client.get_follows(actor=client_did, limit=limit, cursor=cursor),
+        "follows",
+    )
+    return [parse_follower(profile, i, trusted) for i, profile in enumerate(follows)]
 
 
-def get_followers(client, client_did: str, limit: int = 30) -> List[Follower]:
-    cursor = None
-    cleaned_data = []
-    i = 0
-    while True:
-        data = client.get_followers(
-            actor=client_did,
-            limit=limit,
-            cursor=cursor,
+def get_followers(
+    client, client_did: str, limit: int = MAX_PAGE_SIZE, trusted: bool = False
+) -> List[Follower]:
+    followers = paginate(
+        lambda cursor: client.get_followers(
+            actor=client_did, limit=limit, cursor=cursor
+        ),
+        "followers",
+    )
+    return [parse_follower(profile, i, trusted) for i, profile in enumerate(followers)]
+
+
+def sync_graph(
+    client: Client, client_did: str, store: GraphStore, kind: str, total_count: int
+) -> GraphSnapshot:
+    """
+    Refresh the "follows" or "followers" snapshot of the account.
+    The listing is newest first, so paging stops at the first DID that is
+    already in the previous snapshot. total_count is the matching profile
+    counter; when it moved by more than the new DIDs explain, somebody left
+    and the whole listing is read again.
+    """
+    listing = client.get_follows if kind == "follows" else client.get_followers
+
+    def list_dids(stop_when=None) -> List[str]:
+        profiles = paginate(
+            lambda cursor: listing(
+                actor=client_did, limit=MAX_PAGE_SIZE, cursor=cursor
+            ),
+            kind,
+            stop_when=stop_when,
         )
-        if not data.followers:
-            break
-        for profile in data.followers:
-            followers_data = Follower(
-                did=profile.did,
-                handle=profile.handle,
-                display_name=profile.display_name,
-                indexed_at=profile.indexed_at,
-                created_at=profile.created_at,
-                follow_index=i,
-            )
-            i += 1
-            cleaned_data.append(followers_data)
-        cursor = data.cursor
-        if not cursor:
-            break
-    return cleaned_data
+        return [profile.did for profile in profiles]
+
+    previous = store.latest(kind)
+    if previous is None:
+        dids = list_dids()
+    else:
+        new_dids = list_dids(stop_when=lambda profile: profile.did in previous)
+        dids = previous.dids.tolist() + new_dids
+        if total_count - previous.total_count != len(new_dids):
+            dids = list_dids()
+    snapshot = GraphSnapshot(kind, datetime.now(timezone.utc), dids, total_count)
+    store.save(snapshot)
+    return snapshot
@@ -0,0 +1,217 @@
+import time
+from threading import Condition, Lock
+from typing import Callable, Dict, Optional, TypeVar
+
+from atproto_client.exceptions import (
+    InvokeTimeoutError,
+    NetworkError,
+    RequestErrorBase,
+)
+from atproto_client.request import Request
+from tenacity import (
+    RetryCallState,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+T = TypeVar("T")
+
+# Statuses worth another attempt, the server did not act on the request
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _status(error: BaseException) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _header(headers, name: str) -> Optional[float]:
+    try:
+        return float(headers.get(name))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class RateLimitGovernor:
+    """
+    Paces every XRPC request of the process against the server's rate limit.
+    A token bucket is synced to the ratelimit-* headers of every response and
+    refilled when the server's window resets, the number of requests in
+    flight halves on a 429 and grows back by one after a run of successes,
+    and failed requests are retried with jittered exponential backoff.
+    Writes (POST) are only retried on a 429, the server rejected those before
+    doing anything.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_attempts: int = 6,
+        max_backoff: float = 60,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.concurrency = self.max_concurrency
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.throttled_seconds = 0.0
+        # Unknown until the first response carries rate limit headers
+        self._tokens: Optional[float] = None
+        self._capacity = 0.0
+        self._reset_at = 0.0
+        self._in_flight = 0
+        self._successes = 0
+        self._slots = Condition()
+        self._lock = Lock()
+
+    def _throttled(self, seconds: float):
+        with self._lock:
+            self.throttled_seconds += seconds
+
+    def _acquire_slot(self):
+        started = time.monotonic()
+        with self._slots:
+            while self._in_flight >= self.concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+        self._throttled(time.monotonic() - started)
+
+    def _release_slot(self, rate_limited: bool):
+        with self._slots:
+            self._in_flight -= 1
+            if rate_limited:
+                self.concurrency = max(1, self.concurrency // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.concurrency:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self._successes = 0
+            self._slots.notify_all()
+
+    def _take_token(self):
+        while True:
+            with self._lock:
+                if self._tokens is None:
+                    return
+                now = time.time()
+                if now >= self._reset_at:
+                    # The server's window rolled over
+                    self._tokens = self._capacity
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = min(max(self._reset_at - now, 0.05), self.max_backoff)
+                self.throttled_seconds += wait
+            time.sleep(wait)
+
+    def observe(self, headers):
+        limit = _header(headers, "ratelimit-limit")
+        remaining = _header(headers, "ratelimit-remaining")
+        reset = _header(headers, "ratelimit-reset")
+        if limit is None or remaining is None or reset is None:
+            return
+        with self._lock:
+            self._capacity = limit
+            self._reset_at = reset
+            # Other requests in flight took their token before the server counted them
+            self._tokens = max(0.0, remaining - max(0, self._in_flight - 1))
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        backoff = wait_random_exponential(multiplier=0.5, max=self.max_backoff)(
+            retry_state
+        )
+        error = retry_state.outcome.exception()
+        if _status(error) == 429:
+            headers = error.response.headers
+            retry_after = _header(headers, "retry-after")
+            reset = _header(headers, "ratelimit-reset")
+            if retry_after is not None:
+                backoff = max(backoff, retry_after)
+            elif reset is not None:
+                backoff = max(backoff, reset - time.time())
+        return min(backoff, self.max_backoff)
+
+    def _before_sleep(self, retry_state: RetryCallState):
+        with self._lock:
+            self.retries += 1
+            self.throttled_seconds += retry_state.next_action.sleep
+
+    def _attempt(self, send: Callable[[], T]) -> T:
+        self._take_token()
+        self._acquire_slot()
+        with self._lock:
+            self.calls += 1
+        rate_limited = False
+        try:
+            response = send()
+            self.observe(response.headers)
+            return response
+        except RequestErrorBase as e:
+            rate_limited = _status(e) == 429
+            if rate_limited:
+                with self._lock:
+                    self.rate_limited += 1
+            if e.response is not None:
+                self.observe(e.response.headers)
+            raise
+        finally:
+            self._release_slot(rate_limited)
+
+    def call(self, send: Callable[[], T], idempotent: bool = True) -> T:
+        def retryable(error: BaseException) -> bool:
+            status = _status(error)
+            if status == 429:
+                return True
+            if not idempotent:
+                return False
+            if status is None:
+                return isinstance(error, (NetworkError, InvokeTimeoutError))
+            return status in RETRY_STATUSES
+
+        retrying = Retrying(
+            retry=retry_if_exception(retryable),
+            wait=self._wait,
+            stop=stop_after_attempt(self.max_attempts),
+            before_sleep=self._before_sleep,
+            reraise=True,
+        )
+        return retrying(self._attempt, send)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "throttled_seconds": round(self.throttled_seconds, 2),
+                "concurrency": self.concurrency,
+                "tokens": None if self._tokens is None else int(self._tokens),
+            }
+
+
+class GovernedRequest(Request):
+    """
+    atproto Request that sends every XRPC call through a RateLimitGovernor.
+    """
+
+    def __init__(self, governor: Optional[RateLimitGovernor] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.governor = governor or RateLimitGovernor()
+
+    def _send_request(self, method: str, url: str, **kwargs):
+        return self.governor.call(
+            lambda: super(GovernedRequest, self)._send_request(method, url, **kwargs),
+            idempotent=method == "GET",
+        )
+
+    def clone(self) -> "GovernedRequest":
+        # atproto clones the request for proxied calls, keep the same governor
+        cloned = GovernedRequest(self.governor)
+        cloned._additional_headers = self._additional_headers.copy()
+        cloned._additional_header_sources = self._additional_header_sources.copy()
+        return cloned
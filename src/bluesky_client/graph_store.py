@@ -0,0 +1,121 @@
+import hashlib
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from bluesky_client.post_store import _to_utc_iso
+from bluesky_client.sqlite_store import SqliteStore
+
+
+class GraphSnapshot:
+    """
+    The DIDs of the account's follows or followers at one point in time,
+    kept as a sorted array with a set alongside for O(1) membership tests.
+    """
+
+    def __init__(
+        self, kind: str, taken_at: datetime, dids: Iterable[str], total_count: int
+    ):
+        self.kind = kind
+        self.taken_at = taken_at
+        self.dids = np.unique(np.asarray(list(dids), dtype=str))
+        self.total_count = total_count
+        self._members = frozenset(self.dids.tolist())
+        self.fingerprint = hashlib.blake2b(
+            "\n".join(self.dids.tolist()).encode(), digest_size=16
+        ).hexdigest()
+
+    def __contains__(self, did: str) -> bool:
+        return did in self._members
+
+    def __len__(self) -> int:
+        return len(self.dids)
+
+    def diff(self, previous: Optional["GraphSnapshot"]) -> Dict:
+        if previous is None:
+            return {"new": self.dids.tolist(), "lost": []}
+        return {
+            "new": np.setdiff1d(self.dids, previous.dids).tolist(),
+            "lost": np.setdiff1d(previous.dids, self.dids).tolist(),
+        }
+
+    def encode(self) -> bytes:
+        # Sorted DIDs share long prefixes, so they compress very well
+        return zlib.compress("\n".join(self.dids.tolist()).encode())
+
+    @classmethod
+    def decode(
+        cls, kind: str, taken_at: str, blob: bytes, total_count: int
+    ) -> "GraphSnapshot":
+        text = zlib.decompress(blob).decode()
+        return cls(
+            kind,
+            datetime.fromisoformat(taken_at),
+            text.split("\n") if text else [],
+            total_count,
+        )
+
+
+class GraphStore(SqliteStore):
+    """
+    SQLite backed history of follow and follower snapshots. A snapshot is only
+    written when the DID set changed since the previous one.
+    """
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                kind TEXT NOT NULL,
+                taken_at TEXT NOT NULL,
+                total_count INTEGER NOT NULL,
+                dids BLOB NOT NULL,
+                PRIMARY KEY (kind, taken_at)
+            )
+            """
+        )
+
+    def _snapshots(self, kind: str, limit: int):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT taken_at, dids, total_count FROM snapshots WHERE kind = ? "
+                "ORDER BY taken_at DESC LIMIT ?",
+                (kind, limit),
+            ).fetchall()
+        return [
+            GraphSnapshot.decode(kind, row["taken_at"], row["dids"], row["total_count"])
+            for row in rows
+        ]
+
+    def latest(self, kind: str) -> Optional[GraphSnapshot]:
+        snapshots = self._snapshots(kind, 1)
+        return snapshots[0] if snapshots else None
+
+    def diff(self, kind: str) -> Dict:
+        snapshots = self._snapshots(kind, 2) + [None]
+        if snapshots[0] is None:
+            return {"new": [], "lost": []}
+        return snapshots[0].diff(snapshots[1])
+
+    def save(self, snapshot: GraphSnapshot):
+        previous = self.latest(snapshot.kind)
+        if (
+            previous is not None
+            and previous.total_count == snapshot.total_count
+            and np.array_equal(previous.dids, snapshot.dids)
+        ):
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (kind, taken_at, total_count, dids) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    snapshot.kind,
+                    _to_utc_iso(snapshot.taken_at),
+                    snapshot.total_count,
+                    snapshot.encode(),
+                ),
+            )
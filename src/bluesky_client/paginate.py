@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional
+
+# Largest page the app.bsky list endpoints accept
+MAX_PAGE_SIZE = 100
+
+
+def paginate(
+    fetch_page: Callable[[Optional[str]], Any],
+    items_attr: str,
+    stop_when: Optional[Callable[[Any], bool]] = None,
+    prefetch: bool = True,
+) -> Iterator[Any]:
+    """
+    Lazily yield every item of a cursor paginated XRPC listing.
+    fetch_page(cursor) returns one response and items_attr names its list
+    field (e.g. "feed", "likes", "followers"). With prefetch the next page is
+    requested while the caller is still consuming the current one. Iteration
+    ends before the first item for which stop_when returns True; incremental
+    syncs usually stop on the first page, so stop_when turns prefetch off.
+    """
+    prefetch = prefetch and stop_when is None
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        data = fetch_page(None)
+        while True:
+            items = getattr(data, items_attr) or []
+            cursor = data.cursor if items else None
+            next_page = None
+            if cursor and executor is not None:
+                next_page = executor.submit(fetch_page, cursor)
+            for item in items:
+                if stop_when is not None and stop_when(item):
+                    return
+                yield item
+            if not cursor:
+                return
+            data = next_page.result() if next_page is not None else fetch_page(cursor)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,204 @@
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from pandas import DataFrame
+
+from bluesky_client.feed_columns import FEED_COUNTERS, FeedColumns
+from bluesky_client.schemas.construct import build_record
+from bluesky_client.schemas.post import Author, BskyRecord, Embed, Post
+from bluesky_client.sqlite_store import SqliteStore
+
+POST_COLUMNS = [
+    "uri",
+    "author_handle",
+    "indexed_at",
+    "text",
+    "tags",
+    "resource",
+    "thumbnail",
+    "embed_type",
+    "like_count",
+    "quote_count",
+    "reply_count",
+    "repost_count",
+    "bookmark_count",
+]
+
+
+def _to_utc_iso(ts: datetime) -> str:
+    # Stored as UTC ISO strings so that they sort and compare as text
+    return ts.astimezone(timezone.utc).isoformat()
+
+
+def _post_to_row(post: Post) -> tuple:
+    return (
+        post.uri,
+        post.author.handle,
+        _to_utc_iso(post.indexed_at),
+        post.record.text,
+        json.dumps(post.record.tags),
+        post.embed.resource,
+        post.embed.thumbnail,
+        post.embed.embed_type,
+        post.like_count,
+        post.quote_count,
+        post.reply_count,
+        post.repost_count,
+        post.bookmark_count,
+    )
+
+
+def _row_to_post(row: sqlite3.Row, trusted: bool = False) -> Post:
+    return build_record(
+        Post,
+        trusted,
+        uri=row["uri"],
+        author=build_record(Author, trusted, handle=row["author_handle"]),
+        indexed_at=row["indexed_at"],
+        record=build_record(
+            BskyRecord, trusted, text=row["text"], tags=json.loads(row["tags"])
+        ),
+        embed=build_record(
+            Embed,
+            trusted,
+            resource=row["resource"],
+            thumbnail=row["thumbnail"],
+            embed_type=row["embed_type"],
+        ),
+        like_count=row["like_count"],
+        quote_count=row["quote_count"],
+        reply_count=row["reply_count"],
+        repost_count=row["repost_count"],
+        bookmark_count=row["bookmark_count"],
+    )
+
+
+class PostStore(SqliteStore):
+    """
+    SQLite backed store of the author's posts keyed by post URI.
+    """
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                uri TEXT PRIMARY KEY,
+                author_handle TEXT NOT NULL,
+                indexed_at TEXT NOT NULL,
+                text TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                resource TEXT NOT NULL,
+                thumbnail TEXT NOT NULL,
+                embed_type TEXT NOT NULL,
+                like_count INTEGER NOT NULL,
+                quote_count INTEGER NOT NULL,
+                reply_count INTEGER NOT NULL,
+                repost_count INTEGER NOT NULL,
+                bookmark_count INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS posts_indexed_at ON posts (indexed_at)"
+        )
+        # Top-K index per counter, kept current by SQLite as counters refresh
+        for counter in FEED_COUNTERS:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS posts_top_{counter} "
+                f"ON posts (author_handle, {counter}, indexed_at)"
+            )
+
+    def _insert(self, conn: sqlite3.Connection, posts: List[Post]):
+        placeholders = ", ".join("?" for _ in POST_COLUMNS)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO posts ({', '.join(POST_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            [_post_to_row(post) for post in posts],
+        )
+
+    def upsert(self, posts: List[Post]):
+        with self._connect() as conn:
+            self._insert(conn, posts)
+
+    def replace(self, posts: List[Post]):
+        # A full crawl is authoritative, drop posts that were deleted upstream
+        with self._connect() as conn:
+            conn.execute("DELETE FROM posts")
+            self._insert(conn, posts)
+
+    def delete(self, uris: List[str]):
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM posts WHERE uri = ?", [(uri,) for uri in uris]
+            )
+
+    def uris(self) -> Set[str]:
+        with self._connect() as conn:
+            return {row["uri"] for row in conn.execute("SELECT uri FROM posts")}
+
+    def uris_since(self, since: datetime) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT uri FROM posts WHERE indexed_at >= ? ORDER BY indexed_at DESC",
+                (_to_utc_iso(since),),
+            )
+            return [row["uri"] for row in rows]
+
+    def update_counts(self, counts: List[Dict]):
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE posts SET like_count = :like_count, "
+                "quote_count = :quote_count, reply_count = :reply_count, "
+                "repost_count = :repost_count, bookmark_count = :bookmark_count "
+                "WHERE uri = :uri",
+                counts,
+            )
+
+    def feed_dataframe(self, author_handle: str) -> DataFrame:
+        # Columnar read of the feed frame, no Post objects in between
+        columns = FeedColumns()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(
+                f"SELECT indexed_at, embed_type, {', '.join(FEED_COUNTERS)} "
+                "FROM posts WHERE author_handle = ? ORDER BY indexed_at DESC",
+                (author_handle,),
+            )
+            for row in rows:
+                columns.append(row[0], row[1], row[2:])
+        return columns.to_dataframe()
+
+    def top_posts(
+        self,
+        author_handle: str,
+        counter: str,
+        limit: int = 5,
+        since: Optional[datetime] = None,
+        trusted: bool = False,
+    ) -> List[Post]:
+        # Read off the counter's index, newest first among equal counts
+        if counter not in FEED_COUNTERS:
+            raise ValueError(f"Unknown counter {counter}")
+        where = "author_handle = ?"
+        params = [author_handle]
+        if since is not None:
+            where += " AND indexed_at >= ?"
+            params.append(_to_utc_iso(since))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(POST_COLUMNS)} FROM posts WHERE {where} "
+                f"ORDER BY {counter} DESC, indexed_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [_row_to_post(row, trusted) for row in rows]
+
+    def all_posts(self, trusted: bool = False) -> List[Post]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(POST_COLUMNS)} FROM posts "
+                "ORDER BY indexed_at DESC"
+            ).fetchall()
+        return [_row_to_post(row, trusted) for row in rows]
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from atproto import Client
+
+from bluesky_client.fan_out import fan_out
+from bluesky_client.post_store import PostStore
+
+# app.bsky.feed.getPosts accepts at most 25 URIs per call
+GET_POSTS_BATCH_SIZE = 25
+
+
+def get_post_counts(client: Client, uris: List[str]) -> List[Dict]:
+    data = client.get_posts(uris)
+    counts = [
+        {
+            "uri": post.uri,
+            "like_count": post.like_count or 0,
+            "quote_count": post.quote_count or 0,
+            "reply_count": post.reply_count or 0,
+            "repost_count": post.repost_count or 0,
+            "bookmark_count": post.bookmarkCount or 0,
+        }
+        for post in data.posts
+    ]
+    # getPosts leaves out posts that were deleted upstream
+    found = {post["uri"] for post in counts}
+    return counts + [{"uri": uri, "deleted": True} for uri in uris if uri not in found]
+
+
+def refresh_post_metrics(
+    client: Client,
+    store: PostStore,
+    days: Optional[int] = 30,
+    batch_size: int = GET_POSTS_BATCH_SIZE,
+    max_workers: int = 1,
+) -> int:
+    """
+    Update the counters of stored posts from the last days (all of them when
+    days is None) via getPosts, without re-crawling the author feed, and drop
+    the posts it no longer returns. A failed batch changes nothing. Returns
+    how many posts were updated.
+    """
+    if days is None:
+        since = datetime.fromtimestamp(0, timezone.utc)
+    else:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+    uris = store.uris_since(since)
+    batches = [uris[i : i + batch_size] for i in range(0, len(uris), batch_size)]
+    results = fan_out(
+        lambda batch: get_post_counts(client, batch), batches, max_workers
+    )
+    counts = [post for post in results if not post.get("deleted")]
+    store.update_counts(counts)
+    store.delete([post["uri"] for post in results if post.get("deleted")])
+    return len(counts)
@@ -0,0 +1,75 @@
+from collections import namedtuple
+from datetime import datetime
+from typing import Any, Dict, Type, TypeVar, get_args
+
+from pydantic import BaseModel
+
+from bluesky_client.schemas.like import Like
+from bluesky_client.schemas.post import Author, BskyRecord, Embed, Post
+from bluesky_client.schemas.profile import Follower, Profile
+from bluesky_client.schemas.repost import Repost
+
+M = TypeVar("M", bound=BaseModel)
+
+_SPECS: Dict[Type[BaseModel], Dict] = {}
+
+
+def _register(model: Type[BaseModel]):
+    # Compact stand-in for the model: a named tuple with the same fields,
+    # defined at module level so snapshots of trusted records can be pickled
+    names = list(model.model_fields)
+    defaults = []
+    for field in reversed(model.model_fields.values()):
+        if field.is_required():
+            break
+        defaults.insert(0, field.default)
+    record = namedtuple(f"{model.__name__}Record", names, defaults=defaults)
+    record.__module__ = __name__
+    globals()[record.__name__] = record
+    _SPECS[model] = {
+        "record": record,
+        "required": [n for n, f in model.model_fields.items() if f.is_required()],
+        "datetimes": [
+            name
+            for name, field in model.model_fields.items()
+            if field.annotation is datetime or datetime in get_args(field.annotation)
+        ],
+    }
+
+
+for _model in (Author, BskyRecord, Embed, Post, Like, Repost, Profile, Follower):
+    _register(_model)
+
+
+def record_type(model: Type[BaseModel]) -> type:
+    return _SPECS[model]["record"]
+
+
+def build_record(model: Type[M], trusted: bool = False, **fields) -> M:
+    """
+    Build a schema record. Trusted data was already validated by the atproto
+    SDK (or on its way into one of our stores), so it skips pydantic and
+    becomes a named tuple with the model's fields; only ISO timestamps are
+    parsed.
+    """
+    if not trusted:
+        return model(**fields)
+    spec = _SPECS[model]
+    for name in spec["required"]:
+        if fields.get(name) is None:
+            raise ValueError(f"{model.__name__}.{name} is required")
+    for name in spec["datetimes"]:
+        value = fields.get(name)
+        if value.__class__ is str:
+            fields[name] = datetime.fromisoformat(value)
+    return spec["record"](**fields)
+
+
+def as_dict(record: Any) -> Dict:
+    # model_dump for either kind of record, nested records included
+    if isinstance(record, BaseModel):
+        return record.model_dump()
+    return {
+        name: as_dict(value) if hasattr(value, "_asdict") else value
+        for name, value in record._asdict().items()
+    }
@@ -9,4 +9,5 @@ class Repost(BaseModel):
     post_indexed_at: datetime
     indexed_at: datetime
     handle: str
+    did: Optional[str] = None
     avatar: Optional[str] = None
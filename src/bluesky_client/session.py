@@ -0,0 +1,150 @@
+import functools
+import os
+from threading import Lock
+from typing import Callable, Dict, Optional, TypeVar
+
+from atproto import Client, Session, SessionEvent
+from atproto.exceptions import (
+    AtProtocolError,
+    BadRequestError,
+    LoginRequiredError,
+    UnauthorizedError,
+)
+
+from bluesky_client.governor import GovernedRequest, RateLimitGovernor
+
+T = TypeVar("T")
+
+# Errors the server answers a rotated, expired or revoked token with
+AUTH_ERRORS = {"ExpiredToken", "InvalidToken", "AuthenticationRequired"}
+
+
+def is_auth_error(error: AtProtocolError) -> bool:
+    if isinstance(error, (UnauthorizedError, LoginRequiredError)):
+        return True
+    content = getattr(getattr(error, "response", None), "content", None)
+    return (
+        isinstance(error, BadRequestError)
+        and getattr(content, "error", None) in AUTH_ERRORS
+    )
+
+
+class BlueskySession:
+    """
+    Owns a single logged in atproto Client for the whole process.
+    The session string is saved to session_file so that restarts (and the
+    scheduler cron job) can reuse it instead of calling createSession again.
+    The client refreshes the access token itself shortly before it expires;
+    every refresh is written back to the session file. Every request the
+    client sends is paced and retried by the governor. When the server
+    rejects the session (the scheduler rotated the refresh token, or it
+    expired or was revoked) reauthenticating() logs in again and retries.
+    """
+
+    def __init__(
+        self,
+        handle: str,
+        password: str,
+        session_file: str,
+        governor: Optional[RateLimitGovernor] = None,
+        base_url: Optional[str] = None,
+    ):
+        self.handle = handle
+        self.password = password
+        self.session_file = session_file
+        self.base_url = base_url
+        self.governor = governor or RateLimitGovernor()
+        self.logins = 0
+        self.imports = 0
+        self.refreshes = 0
+        self._client: Optional[Client] = None
+        self._lock = Lock()
+
+    def _save_session(self, session: Session):
+        folder = os.path.dirname(self.session_file)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        # Holds the refresh token, keep it readable by the owner only
+        fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # The mode only applies on creation, tighten files saved before
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(session.encode())
+
+    def _load_session(self) -> Optional[str]:
+        if not os.path.exists(self.session_file):
+            return None
+        with open(self.session_file) as f:
+            return f.read().strip() or None
+
+    def _new_client(self) -> Client:
+        client = Client(self.base_url, request=GovernedRequest(self.governor))
+
+        # atproto only registers plain functions as callbacks, not bound methods
+        def on_session_change(event: SessionEvent, session: Session):
+            if event == SessionEvent.CREATE:
+                self.logins += 1
+            elif event == SessionEvent.REFRESH:
+                self.refreshes += 1
+            elif event == SessionEvent.IMPORT:
+                self.imports += 1
+            self._save_session(session)
+
+        client.on_session_change(on_session_change)
+        return client
+
+    def _login(self) -> Client:
+        session_string = self._load_session()
+        if session_string:
+            client = self._new_client()
+            try:
+                client.login(session_string=session_string)
+                return client
+            except (AtProtocolError, ValueError) as e:
+                # Refresh token expired or revoked, fall back to the password
+                print(f"Saved session rejected, logging in again — {e}")
+        client = self._new_client()
+        client.login(self.handle, self.password)
+        return client
+
+    def get_client(self) -> Client:
+        with self._lock:
+            if self._client is None:
+                self._client = self._login()
+            return self._client
+
+    def reset(self):
+        # The next get_client() logs in again, from the session file first
+        with self._lock:
+            self._client = None
+
+    def reauthenticating(self, func: Callable[..., T]) -> Callable[..., T]:
+        """
+        Decorate a function that fetches through get_client(): when the server
+        rejects the session, log in again and run it once more.
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> T:
+            try:
+                return func(*args, **kwargs)
+            except AtProtocolError as e:
+                if not is_auth_error(e):
+                    raise
+                print(f"Session rejected, logging in again — {e}")
+                self.reset()
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    @property
+    def did(self) -> str:
+        return self.get_client().me.did
+
+    def stats(self) -> Dict:
+        return {
+            "logins": self.logins,
+            "imports": self.imports,
+            "refreshes": self.refreshes,
+            "requests": self.governor.stats(),
+        }
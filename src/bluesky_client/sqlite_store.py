@@ -0,0 +1,33 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SqliteStore:
+    """
+    Base for the local SQLite stores, subclasses create their tables in
+    _create_tables.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self._connect() as conn:
+            self._create_tables(conn)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        raise NotImplementedError
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per call keeps the store usable from worker threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
@@ -16,3 +16,28 @@ QUEUE_RULES_FILE_PATH = "schedule/rules.csv"
 SCHEDULE_FOLDER = os.path.join(WEB_PATH, SCHEDULE_FILE_PATH)
 RULES_FOLDER = os.path.join(WEB_PATH, QUEUE_RULES_FILE_PATH)
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "mp4"}
+# Server the client logs in to, unset for the atproto default (bsky.social)
+BLUESKY_BASE_URL = os.getenv("BLUESKY_BASE_URL")
+# Kept outside of src/static so the tokens are never served by Flask
+SESSION_FILE = os.path.join(ROOT_DIR, ".bluesky_session")
+# The stores and the shared cache, outside of src/static for the same reason
+STORE_FOLDER = os.path.join(ROOT_DIR, "store")
+# Number of posts whose likes/reposts are harvested at the same time
+HARVEST_CONCURRENCY = int(os.getenv("HARVEST_CONCURRENCY", 8))
+# Attempts per Bluesky request before a 429 or network error is given up on
+REQUEST_MAX_ATTEMPTS = int(os.getenv("REQUEST_MAX_ATTEMPTS", 6))
+# Skip pydantic validation of records the atproto SDK already validated
+TRUSTED_RECORDS = os.getenv("TRUSTED_RECORDS", "0") == "1"
+# Local copy of the author feed and how many days of it are re-read on refresh
+POST_STORE_PATH = os.path.join(STORE_FOLDER, "posts.db")
+FEED_FRESHNESS_DAYS = int(os.getenv("FEED_FRESHNESS_DAYS", 3))
+# Stored posts from the last METRICS_REFRESH_DAYS get their counters refreshed
+METRICS_REFRESH_DAYS = int(os.getenv("METRICS_REFRESH_DAYS", 30))
+# Seconds between refreshes of the counters of every stored post, older ones too
+METRICS_FULL_REFRESH_SECONDS = int(os.getenv("METRICS_FULL_REFRESH_SECONDS", 86400))
+ENGAGEMENT_STORE_PATH = os.path.join(STORE_FOLDER, "engagement.db")
+GRAPH_STORE_PATH = os.path.join(STORE_FOLDER, "graph.db")
+# Time zone the weekday/hour charts are drawn in, overridable with ?tz=
+DISPLAY_TIMEZONE = os.getenv("DISPLAY_TIMEZONE", "UTC")
+# Cache shared by every app worker and script on the host
+CACHE_PATH = os.path.join(STORE_FOLDER, "cache.db")
@@ -0,0 +1,42 @@
+import hashlib
+from typing import Any, Dict
+
+import orjson
+import pandas as pd
+from flask import Response, request
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    # Types orjson doesn't know natively
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def etagged(body: bytes) -> Dict:
+    return {"body": body, "etag": hashlib.blake2b(body, digest_size=16).hexdigest()}
+
+
+def encode_payload(value: Any) -> Dict:
+    return etagged(orjson.dumps(value, default=_default, option=OPTIONS))
+
+
+def encode_event(event: str, data: Any) -> bytes:
+    # One line of an NDJSON stream
+    return orjson.dumps(
+        {"event": event, "data": data},
+        default=_default,
+        option=OPTIONS | orjson.OPT_APPEND_NEWLINE,
+    )
+
+
+def payload_response(payload: Dict, mimetype: str = "application/json") -> Response:
+    # Browsers revalidate with If-None-Match and get a bodiless 304 back
+    response = Response(payload["body"], mimetype=mimetype)
+    response.set_etag(payload["etag"])
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
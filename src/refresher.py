@@ -0,0 +1,172 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class SnapshotRefresher:
+    """
+    Serves the last good snapshot of every registered source straight away
+    and rebuilds it in the background once it is older than refresh_after.
+    Snapshots are kept in the shared cache without expiry, so every worker
+    serves the same one and a failed rebuild leaves the previous one in place.
+    Only a cold start (no snapshot at all) blocks the caller. A source built
+    from other sources is also stale once any of them was rebuilt after it.
+    A build holds a lease in the shared cache, so only one worker on the host
+    rebuilds a source at a time. The lease is renewed while the build runs
+    and expires lease_timeout after its worker died mid-build.
+    """
+
+    def __init__(self, backend, poll_interval: int = 30, lease_timeout: int = 120):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self._sources: Dict[str, Dict] = {}
+        self._queued = set()
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._started = Event()
+
+    def register(
+        self,
+        name: str,
+        build: Callable[[], Any],
+        refresh_after: int,
+        depends_on: Iterable[str] = (),
+    ):
+        # Register upstream sources first, the poller refreshes in this order
+        self._sources[name] = {
+            "build": build,
+            "refresh_after": refresh_after,
+            "depends_on": list(depends_on),
+        }
+
+    def _entry(self, name: str) -> Optional[Dict]:
+        return self.backend.get(f"snapshot/{name}")
+
+    def _built_at(self, name: str) -> Optional[float]:
+        # Kept under its own key so checking it doesn't load the snapshot
+        built_at = self.backend.get(f"snapshot-built/{name}")
+        if built_at is None:
+            entry = self._entry(name)
+            built_at = entry["built_at"] if entry else None
+        return built_at
+
+    def _is_stale(self, name: str, built_at: Optional[float]) -> bool:
+        if built_at is None:
+            return True
+        source = self._sources[name]
+        if time.time() - built_at >= source["refresh_after"]:
+            return True
+        return any(
+            (self._built_at(upstream) or 0) > built_at
+            for upstream in source["depends_on"]
+        )
+
+    def _building(self, name: str) -> bool:
+        return self.backend.has(f"snapshot-lease/{name}")
+
+    def _renew(self, lease: str, token: str, done: Event):
+        # Keep the lease for as long as the build runs, a cold crawl takes hours
+        while not done.wait(self.lease_timeout / 3):
+            if self.backend.get(lease) != token:
+                return
+            self.backend.set(lease, token, timeout=self.lease_timeout)
+
+    def refresh(self, name: str, force: bool = False) -> Optional[Dict]:
+        # Returns the new snapshot, or None when nothing was built
+        lease = f"snapshot-lease/{name}"
+        token = uuid.uuid4().hex
+        if not self.backend.add(lease, token, timeout=self.lease_timeout):
+            return None
+        done = Event()
+        Thread(target=self._renew, args=(lease, token, done), daemon=True).start()
+        try:
+            # Another worker may have rebuilt it while this one was queued
+            if not force and not self._is_stale(name, self._built_at(name)):
+                return None
+            entry = {"value": self._sources[name]["build"](), "built_at": time.time()}
+            self.backend.set(f"snapshot/{name}", entry, timeout=0)
+            self.backend.set(f"snapshot-built/{name}", entry["built_at"], timeout=0)
+            return entry
+        except Exception as e:
+            print(f"Refreshing {name} failed, keeping the last snapshot — {e}")
+            return None
+        finally:
+            done.set()
+            if self.backend.get(lease) == token:
+                self.backend.delete(lease)
+
+    def _refresh_queued(self, name: str):
+        try:
+            self.refresh(name)
+        finally:
+            with self._lock:
+                self._queued.discard(name)
+
+    def get(self, name: str) -> Any:
+        entry = self._entry(name)
+        if entry is None:
+            entry = self.refresh(name)
+            while entry is None and self._building(name):
+                # A concurrent cold build is running, wait for its snapshot
+                time.sleep(0.5)
+                entry = self._entry(name)
+            entry = entry or self._entry(name)
+            if entry is None:
+                raise RuntimeError(f"No snapshot of {name} could be built")
+        elif self._is_stale(name, entry["built_at"]):
+            # One queued refresh per source however many requests see it stale
+            with self._lock:
+                queued = name in self._queued
+                self._queued.add(name)
+            if not queued:
+                self._executor.submit(self._refresh_queued, name)
+        return entry["value"]
+
+    def reporter(self, name: str) -> Callable[[int, int], None]:
+        # progress(done, total) callback for a build, shared with every worker
+        last_write = 0.0
+
+        def report(done: int, total: int):
+            nonlocal last_write
+            now = time.time()
+            if done == total or now - last_write >= 0.25:
+                last_write = now
+                self.backend.set(
+                    f"snapshot-progress/{name}",
+                    {"done": done, "total": total, "at": now},
+                    timeout=3600,
+                )
+
+        return report
+
+    def progress(self, name: str) -> Optional[Dict]:
+        return self.backend.get(f"snapshot-progress/{name}")
+
+    def built_at(self, *names: str) -> Optional[float]:
+        # Build time of the oldest of the given snapshots
+        built = [self._built_at(name) for name in names]
+        if any(built_at is None for built_at in built):
+            return None
+        return min(built)
+
+    def age(self, *names: str) -> Optional[float]:
+        # Age in seconds of the oldest of the given snapshots
+        built_at = self.built_at(*names)
+        return None if built_at is None else round(time.time() - built_at, 1)
+
+    def _poll(self):
+        while True:
+            for name in self._sources:
+                # Only the build time is read, not the snapshot itself
+                if self._is_stale(name, self._built_at(name)):
+                    self.refresh(name)
+            time.sleep(self.poll_interval)
+
+    def start(self):
+        if self._started.is_set():
+            return
+        self._started.set()
+        Thread(target=self._poll, daemon=True).start()
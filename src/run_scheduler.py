@@ -1,6 +1,9 @@
+from bluesky_client.session import BlueskySession
 from config import (
+    BLUESKY_BASE_URL,
     QUEUE_RULES_FILE_PATH,
     SCHEDULE_FILE_PATH,
+    SESSION_FILE,
     USER_HANDLE,
     USER_PASSWORD,
     WEB_PATH,
@@ -8,7 +11,11 @@ from config import (
 from scheduler.scheduler import BlueskyScheduler
 
 if __name__ == "__main__":
+    session = BlueskySession(
+        USER_HANDLE, USER_PASSWORD, SESSION_FILE, base_url=BLUESKY_BASE_URL
+    )
     scheduler = BlueskyScheduler(
-        USER_HANDLE, USER_PASSWORD, WEB_PATH, SCHEDULE_FILE_PATH, QUEUE_RULES_FILE_PATH
+        session.get_client(), WEB_PATH, SCHEDULE_FILE_PATH, QUEUE_RULES_FILE_PATH
     )
     scheduler.run()
+    print(f"Session stats: {session.stats()}")
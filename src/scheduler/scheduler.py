@@ -57,9 +57,8 @@ def prepare_image_for_bluesky_upload(
 
 
 class BlueskyScheduler:
-    def __init__(self, handle, password, web_path, schedule_folder, rules_folder):
-        self.client = Client()
-        self.client.login(handle, password)
+    def __init__(self, client: Client, web_path, schedule_folder, rules_folder):
+        self.client = client
         self.web_path = web_path
         self.schedule_path = os.path.join(web_path, schedule_folder)
         self.rules_path = os.path.join(web_path, rules_folder)
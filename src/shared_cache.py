@@ -0,0 +1,122 @@
+import pickle
+import sqlite3
+import time
+from typing import Any, Optional, Tuple
+
+import pyarrow as pa
+from flask_caching.backends.base import BaseCache
+from pandas import DataFrame
+
+from bluesky_client.sqlite_store import SqliteStore
+
+
+def serialize(value: Any) -> Tuple[str, bytes]:
+    if isinstance(value, DataFrame):
+        try:
+            table = pa.Table.from_pandas(value)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return "arrow", sink.getvalue().to_pybytes()
+        except (pa.ArrowException, TypeError, ValueError):
+            # Mixed object columns Arrow can't type, keep them pickled
+            pass
+    return "pickle", pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize(kind: str, blob: bytes) -> Any:
+    if kind == "arrow":
+        # Arrow reads the record batches straight out of the blob buffer
+        return pa.ipc.open_stream(pa.py_buffer(blob)).read_all().to_pandas()
+    return pickle.loads(blob)
+
+
+class SqliteArrowCache(BaseCache, SqliteStore):
+    """
+    Flask-Caching backend shared by every process on the host through one
+    SQLite file. DataFrames are stored as Arrow IPC streams, anything else is
+    pickled.
+    """
+
+    def __init__(self, path: str, default_timeout: int = 300):
+        BaseCache.__init__(self, default_timeout=default_timeout)
+        SqliteStore.__init__(self, path)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        return cls(
+            config["CACHE_SQLITE_PATH"],
+            default_timeout=config.get("CACHE_DEFAULT_TIMEOUT", 300),
+        )
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                expires REAL NOT NULL,
+                kind TEXT NOT NULL,
+                value BLOB NOT NULL
+            )
+            """
+        )
+
+    def _expires(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else 0
+
+    def get(self, key: str) -> Any:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT expires, kind, value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row["expires"] and row["expires"] < time.time()):
+            return None
+        return deserialize(row["kind"], row["value"])
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        kind, blob = serialize(value)
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM cache WHERE expires > 0 AND expires < ?", (time.time(),)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires, kind, value) "
+                "VALUES (?, ?, ?, ?)",
+                (key, self._expires(timeout), kind, blob),
+            )
+        return True
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        # One write transaction, so of concurrent adds exactly one wins
+        kind, blob = serialize(value)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM cache WHERE key = ? AND expires > 0 AND expires < ?",
+                (key, time.time()),
+            )
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO cache (key, expires, kind, value) "
+                "VALUES (?, ?, ?, ?)",
+                (key, self._expires(timeout), kind, blob),
+            ).rowcount
+        return inserted > 0
+
+    def delete(self, key: str) -> bool:
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+        return deleted > 0
+
+    def has(self, key: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and not (row["expires"] and row["expires"] < time.time())
+
+    def clear(self) -> bool:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+        return True